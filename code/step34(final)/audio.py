@@ -0,0 +1,213 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import wave
+
+import numpy as np
+
+
+class AudioClip:
+    """재생할 소리 하나 (메모리의 16bit PCM과 디스크의 원본 파일)"""
+    __slots__ = ("samples", "sample_rate", "path")
+
+    def __init__(self, samples, sample_rate, path=None):
+        self.samples = samples  # (프레임,) 또는 (프레임, 채널) int16. 읽을 수 없는 형식이면 None
+        self.sample_rate = sample_rate
+        self.path = path
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate if self.samples is not None else None
+
+
+def read_wav(path):
+    """WAV 파일을 AudioClip으로 읽습니다 (16bit PCM이 아니면 samples=None, 파일 경로로만 재생)."""
+    try:
+        with wave.open(path, "rb") as f:
+            if f.getsampwidth() != 2:
+                return AudioClip(None, f.getframerate(), path)
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            if f.getnchannels() > 1:
+                samples = samples.reshape(-1, f.getnchannels())
+            return AudioClip(samples, f.getframerate(), path)
+    except (wave.Error, EOFError):  # macOS(nsss)는 AIFF로 저장
+        return AudioClip(None, 0, path)
+
+
+class PhraseCache:
+    """TTS 문장을 미리 합성해 둔 캐시
+
+    pyttsx3 save_to_file()로 문장을 파일로 합성하고 PCM을 메모리에 올려 둡니다.
+    파일 이름은 (문장, 음성, 속도, 볼륨)의 해시이므로 설정이 같으면 다음 실행에서 합성 없이 읽기만 합니다.
+    engine은 호출한 쪽의 잠금 안에서만 사용해야 합니다 (pyttsx3 엔진은 스레드 안전하지 않음).
+    """
+    def __init__(self, engine, cache_dir):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.clips = {}  # 문장 -> AudioClip
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text):
+        voice = self.engine.getProperty('voice')
+        rate = self.engine.getProperty('rate')
+        volume = self.engine.getProperty('volume')
+        return hashlib.sha1(f"{text}|{voice}|{rate}|{volume:.2f}".encode()).hexdigest()[:20]
+
+    def get(self, text):
+        return self.clips.get(text)
+
+    def load(self, text):
+        """캐시(메모리 -> 디스크 -> 합성 순)에서 문장을 가져옵니다. (AudioClip, 새로 합성했는지) 반환"""
+        clip = self.clips.get(text)
+        if clip is not None:
+            return clip, False
+        path = os.path.join(self.cache_dir, self.key(text) + ".wav")
+        synthesized = not os.path.exists(path)
+        if synthesized:
+            partial = path[:-len(".wav")] + ".part.wav"  # 합성 도중 중단되어도 깨진 파일이 캐시에 남지 않도록
+            self.engine.save_to_file(text, partial)
+            self.engine.runAndWait()
+            if not os.path.exists(partial):
+                return None, True
+            os.replace(partial, path)
+        clip = self.clips[text] = read_wav(path)
+        return clip, synthesized
+
+    def prerender(self, texts):
+        """문장 목록을 모두 준비합니다. 새로 합성한 문장 수 반환"""
+        return sum(self.load(text)[1] for text in texts)
+
+
+class SoundDeviceSink:
+    """sounddevice(PortAudio)로 메모리의 PCM을 바로 재생 (가장 지연이 짧음)
+
+    sd.play()는 모듈 전역 스트림 하나를 써서 다른 재생을 끊으므로, 장치마다 자기 출력 스트림을 한 번 열어
+    계속 쓰고(형식이 바뀔 때만 다시 엶) 블록 단위로 씁니다. TTS와 신호음은 서로 끊지 않고 OS 믹서에서 섞이며,
+    클립마다 스트림을 여는 지연이 없습니다. stop()은 다음 블록 전에 반영되며, reset()할 때까지 유지되므로
+    재생 시작 직전에 온 stop()도 잃지 않습니다.
+    """
+    mixes = True  # 다른 장치 인스턴스와 동시에 재생 가능
+    block = 512  # 한 번에 쓰는 프레임 수 (22.05kHz에서 약 23ms)
+
+    def __init__(self):
+        import sounddevice  # 선택 의존성
+        self.sd = sounddevice
+        try:  # 설치되어 있어도 쓸 수 있는 출력 장치가 없으면 첫 재생에서야 실패하므로 여기서 확인
+            sounddevice.check_output_settings(channels=1, dtype="int16")
+        except sounddevice.PortAudioError as e:
+            raise OSError(f"no usable audio output device: {e}") from e
+        self.stream = None
+        self.stopped = threading.Event()
+
+    def _open(self, sample_rate, channels):
+        if self.stream is not None:
+            if (self.stream.samplerate, self.stream.channels) == (sample_rate, channels):
+                return self.stream
+            self.stream.close()
+        self.stream = self.sd.OutputStream(sample_rate, channels=channels, dtype="int16", latency="low")
+        self.stream.start()  # 쓸 데이터가 없는 동안은 무음으로 재생
+        return self.stream
+
+    def play(self, clip):
+        if clip.samples is None:
+            return False
+        samples = clip.samples.reshape(len(clip.samples), -1)
+        stream = self._open(clip.sample_rate, samples.shape[1])
+        for start in range(0, len(samples), self.block):
+            if self.stopped.is_set():
+                break
+            stream.write(samples[start:start + self.block])
+        return True
+
+    def stop(self):
+        self.stopped.set()
+
+    def reset(self):
+        """다음 재생을 위해 중단 표시를 지웁니다 (재생 시작 전에 호출, stop()과의 경쟁 방지)."""
+        self.stopped.clear()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class WinsoundSink:
+    """Windows 기본 winsound로 캐시된 WAV 파일 재생"""
+    mixes = False  # PlaySound는 프로세스당 한 소리만 재생 (새 소리가 이전 소리를 끊음)
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+        self.stopped = threading.Event()
+
+    def play(self, clip):
+        if clip.path is None or clip.duration is None:
+            return False
+        if self.stopped.is_set():
+            return True
+        self.winsound.PlaySound(clip.path, self.winsound.SND_FILENAME | self.winsound.SND_ASYNC)
+        if self.stopped.wait(clip.duration):  # stop()이 오면 바로 반환
+            self.winsound.PlaySound(None, 0)
+        return True
+
+    def stop(self):
+        self.stopped.set()
+        self.winsound.PlaySound(None, 0)
+
+    def reset(self):
+        self.stopped.clear()
+
+
+class CommandSink:
+    """aplay(Linux) / afplay(macOS) 명령으로 캐시된 파일 재생 (프로세스 시작 비용이 있음)"""
+    mixes = True  # 재생마다 별도 프로세스 (OS 믹서에서 섞임)
+
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+        self.stopped = threading.Event()
+
+    def play(self, clip):
+        if clip.path is None:
+            return False
+        if self.stopped.is_set():
+            return True
+        self.process = subprocess.Popen(self.command + [clip.path],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if self.stopped.is_set():  # 프로세스를 시작하는 사이에 온 stop()
+            self.process.terminate()
+        self.process.wait()
+        return True
+
+    def stop(self):
+        self.stopped.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def reset(self):
+        self.stopped.clear()
+
+
+def create_audio_sink(kind="auto"):
+    """재생 장치 생성: auto / sounddevice / winsound / command / none. 사용할 수 없으면 None (실시간 합성)"""
+    if kind in ("auto", "sounddevice"):
+        try:
+            return SoundDeviceSink()
+        except (ImportError, OSError) as e:  # 설치되지 않았거나 PortAudio / 출력 장치가 없음
+            if isinstance(e, OSError):
+                print(f"sounddevice is not usable: {e}")
+            if kind == "sounddevice":
+                print("sounddevice is not available. Falling back to live synthesis.")
+                return None
+    if kind in ("auto", "winsound") and sys.platform == "win32":
+        return WinsoundSink()
+    if kind in ("auto", "command"):
+        for command in (["aplay", "-q"], ["afplay"]):
+            if shutil.which(command[0]):
+                return CommandSink(command)
+    return None
@@ -0,0 +1,66 @@
+"""MiDaS 전처리 위치별 프레임당 지연시간 벤치마크 (CPU)
+
+  - python : cv2.resize + np.transpose + np.expand_dims 후 f32 NCHW 입력으로 추론 (기존 방식)
+  - baked  : PrePostProcessor로 전처리를 모델에 포함, u8 NHWC BGR 카메라 프레임을 그대로 추론
+
+사용 예:
+    python bench_depth_preprocess.py --frames 300 --width 1280 --height 720
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import openvino as ov
+
+from test_depth import DepthProcessor, build_depth_preprocessing, download_midas_model
+
+
+def measure(processor, frames):
+    processor.process_frame(frames[0])  # 워밍업
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        processor.process_frame(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--device", default="CPU")
+    args = parser.parse_args()
+
+    core = ov.Core()
+    model_path = download_midas_model()
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    legacy_model = core.compile_model(core.read_model(model_path), args.device)
+    legacy = DepthProcessor(legacy_model, legacy_model.input(0), legacy_model.output(0))
+
+    baked_model = core.compile_model(
+        build_depth_preprocessing(core.read_model(model_path), args.width, args.height), args.device
+    )
+    baked = DepthProcessor(baked_model, baked_model.input(0), baked_model.output(0),
+                           frame_size=(args.width, args.height))
+
+    preprocess_only = []
+    for frame in frames[:100]:
+        start = time.perf_counter()
+        legacy.preprocess(frame)
+        preprocess_only.append((time.perf_counter() - start) * 1000)
+    print(f"python preprocess only: {statistics.mean(preprocess_only):.2f}ms/frame")
+
+    for name, processor in (("python", legacy), ("baked", baked)):
+        timings = sorted(measure(processor, frames))
+        print(f"{name:7s} mean={statistics.mean(timings):6.2f}ms "
+              f"p50={timings[len(timings) // 2]:6.2f}ms p95={timings[int(len(timings) * 0.95)]:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
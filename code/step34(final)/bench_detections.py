@@ -0,0 +1,78 @@
+"""YOLO 탐지 결과 처리 방식별 프레임당 시간 벤치마크 (박스 수별)
+
+  - loop      : 박스마다 tolist/int/이름 조회/rectangle/putText (기존 run_detection 방식)
+  - vector    : 구조화 배열로 필터링/최고 탐지 선택 + 한 번에 그리기
+  - headless  : vector에서 그리기 생략 (CHORONG_DISPLAY=0)
+
+사용 예:
+    python bench_detections.py --boxes 1 10 50 --iterations 2000
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from test_detect import best_detection, draw_detections, make_name_table, to_detections
+
+
+def make_outputs(rng, count, num_classes):
+    x1 = rng.uniform(0, 280, count)
+    y1 = rng.uniform(0, 440, count)
+    boxes = np.stack([x1, y1, x1 + rng.uniform(10, 40, count), y1 + rng.uniform(10, 40, count)], 1)
+    return boxes.astype(np.float32), rng.uniform(0, 1, count).astype(np.float32), \
+        rng.integers(0, num_classes, count).astype(np.float32)
+
+
+def loop_path(outputs, names, canvas, threshold):
+    boxes, scores, classes = outputs
+    for box, cls, score in zip(boxes, classes, scores):
+        if score < threshold:
+            continue
+        x1, y1, x2, y2 = map(int, box.tolist())
+        class_name = names[int(cls)]
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(canvas, f"{class_name} ({score:.2f})", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+
+
+def vector_path(outputs, name_table, canvas, threshold, draw=True):
+    detections = to_detections(*outputs)
+    detections = detections[detections['conf'] >= threshold]
+    best_detection(detections)
+    if draw and len(detections):
+        labels = [f"{name} ({conf:.2f})" for name, conf in
+                  zip(name_table[detections['cls']], detections['conf'].tolist())]
+        draw_detections(canvas, detections, labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    names = {i: f"product_{i}" for i in range(20)}
+    name_table = make_name_table(names)
+    canvas = np.zeros((480, 320, 3), dtype=np.uint8)
+
+    for count in args.boxes:
+        outputs = make_outputs(rng, count, len(names))
+        runs = {
+            "loop": lambda: loop_path(outputs, names, canvas, args.threshold),
+            "vector": lambda: vector_path(outputs, name_table, canvas, args.threshold),
+            "headless": lambda: vector_path(outputs, name_table, canvas, args.threshold, draw=False),
+        }
+        line = []
+        for name, run in runs.items():
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                run()
+            line.append(f"{name}={(time.perf_counter() - start) / args.iterations * 1e6:8.1f}us")
+        print(f"boxes={count:3d} " + " ".join(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""손 랜드마크 백엔드 비교 벤치마크 (mp.solutions.hands vs MediaPipe Tasks HandLandmarker)
+
+  - solutions : Hands.process 동기 호출 (기존 방식)
+  - tasks     : HandLandmarker LIVE_STREAM, 한 번에 한 프레임씩 제출 후 콜백 대기 (실행 계층과 같은 방식)
+  - tasks-fps : HandLandmarker LIVE_STREAM, --fps 간격으로 기다리지 않고 계속 제출 (바쁠 때 무시되는 프레임 포함)
+
+각 방식의 프레임당 지연시간(mean/p95), 처리량(fps), 손이 검출된 프레임 비율을 출력합니다.
+손이 나오는 녹화 영상으로 측정해야 추적(tracking) 경로까지 반영됩니다.
+
+사용 예:
+    python bench_hand_backends.py --video hands.mp4 --frames 300
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from test_hand import HandLandmarkModel, HandLandmarkerModel
+
+
+def load_frames(video, max_frames, width, height):
+    if video is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(max_frames)]
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def measure_sync(model, frames):
+    """한 프레임씩 추론하고 (지연시간 목록, 전체 시간, 손 검출 프레임 수)를 반환합니다."""
+    model.infer(frames[0])  # 워밍업
+    timings, found = [], 0
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        hands = model.infer(frame)
+        timings.append((time.perf_counter() - t0) * 1000)
+        found += bool(hands)
+    return timings, time.perf_counter() - start, found
+
+
+def measure_stream(model, frames, fps):
+    """fps 간격으로 제출만 하고, 콜백으로 돌아온 결과의 지연시간을 모읍니다."""
+    model.infer(frames[0])  # 워밍업
+    timings, found, lock = [], [0], threading.Lock()
+    completed = threading.Semaphore(0)
+
+    def make_callback(submitted):
+        def on_done(hands, error):
+            with lock:
+                if hands:  # 무시된 프레임은 빈 결과로 완료됨
+                    found[0] += 1
+                timings.append((time.perf_counter() - submitted) * 1000)
+            completed.release()
+        return on_done
+
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        delay = start + i / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        model.infer_async(frame, make_callback(time.perf_counter()))
+    deadline = time.perf_counter() + 5  # 마지막 프레임들은 콜백이 오지 않을 수 있음
+    for _ in frames:
+        if not completed.acquire(timeout=max(deadline - time.perf_counter(), 0)):
+            break
+    return timings, time.perf_counter() - start, found[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="녹화 영상 경로 (없으면 무작위 프레임)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30, help="tasks-fps 방식의 제출 속도")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.width, args.height)
+    runs = [("solutions", HandLandmarkModel, measure_sync),
+            ("tasks", HandLandmarkerModel, measure_sync),
+            ("tasks-fps", HandLandmarkerModel, lambda m, f: measure_stream(m, f, args.fps))]
+    for name, factory, measure in runs:
+        model = factory()
+        timings, elapsed, found = measure(model, frames)
+        if hasattr(model, "close"):
+            model.close()
+        timings.sort()
+        print(f"{name:10s} mean={statistics.mean(timings):6.2f}ms p95={timings[int(len(timings) * 0.95)]:6.2f}ms "
+              f"throughput={len(frames) / elapsed:6.1f}fps hands={found / len(frames):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""프레임 공유 방식별 메모리/할당 벤치마크 (녹화 영상 재생)
+
+녹화 영상(또는 합성 프레임)을 지정한 시간만큼 재생하면서 두 가지 방식을 비교합니다.
+  - copy : 기존 방식. cap.read()가 매 프레임 새 배열을 만들고, 공급자와 각 스테이지가 다시 복사
+  - pool : CaptureThread + BufferPool + FrameChannel. 읽기 전용 뷰를 공유하고 오버레이할 때만 복사
+
+사용 예:
+    python bench_memory.py --video session.mp4 --minutes 10
+    python bench_memory.py --minutes 10 --speed 20   # 합성 프레임, 20배속
+"""
+import argparse
+import asyncio
+import resource
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_channel import FrameChannel
+from test_webcam import CaptureThread
+
+
+class ReplayCapture:
+    """cv2.VideoCapture와 같은 grab/retrieve/read 인터페이스로 프레임을 재생합니다."""
+    def __init__(self, frames, fps, total_frames):
+        self.frames = frames
+        self.period = 1.0 / fps
+        self.total_frames = total_frames
+        self.position = 0
+        self.next_time = time.perf_counter()
+
+    def grab(self):
+        if self.position >= self.total_frames:
+            return False
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)  # 카메라 프레임 주기 재현
+        self.next_time += self.period
+        self.position += 1
+        return True
+
+    def retrieve(self, image=None):
+        source = self.frames[self.position % len(self.frames)]
+        if image is None or image.shape != source.shape:
+            return True, source.copy()  # 드라이버가 새 버퍼를 할당하는 경우
+        np.copyto(image, source)  # 미리 할당된 버퍼에 디코딩
+        return True, image
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+
+def load_frames(video, width, height, count=90):
+    if video is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    cap.release()
+    if not frames:
+        raise ValueError(f"영상을 읽을 수 없습니다: {video}")
+    return frames
+
+
+def fake_stage_work(image):
+    """추론 전처리 흉내 (입력 해상도로 축소)"""
+    return cv2.resize(image, (256, 256))
+
+
+async def run_copy_mode(capture, counters):
+    """기존 방식: 공급자 복사 + 스테이지별 복사"""
+    shared_data = {'frame': None, 'running': True}
+
+    async def provider():
+        while shared_data['running']:
+            ret, frame = capture.read()
+            if not ret:
+                shared_data['running'] = False
+                break
+            shared_data['frame'] = frame.copy()
+            counters['frames'] += 1
+            await asyncio.sleep(0)
+
+    async def stage(name):
+        while shared_data['running']:
+            frame = shared_data['frame']
+            if frame is None:
+                await asyncio.sleep(0)
+                continue
+            fake_stage_work(frame)
+            if name == "hand":
+                frame.copy()  # run_hand_detection의 frame.copy()
+            elif name == "depth":
+                cv2.resize(frame, (256, 256)).copy()  # depth_frame.copy()
+            counters['processed'] += 1
+            await asyncio.sleep(0)
+
+    await asyncio.gather(provider(), stage("depth"), stage("hand"), stage("yolo"))
+
+
+async def run_pool_mode(capture, counters, width, height):
+    """풀 방식: 읽기 전용 뷰 공유, 오버레이가 필요한 스테이지만 복사"""
+    channel = FrameChannel()
+    capture_thread = CaptureThread(capture, width, height)
+    loop = asyncio.get_running_loop()
+    frame_ready = asyncio.Event()
+    capture_thread.start(on_frame=lambda: loop.call_soon_threadsafe(frame_ready.set))
+
+    async def provider():
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            if capture_thread.error is not None:
+                channel.close()
+                break
+            latest = capture_thread.latest()
+            if latest is None:
+                continue
+            _, timestamp, index = latest
+            channel.publish(capture_thread.pool.view(index), timestamp, pool=capture_thread.pool, index=index)
+            counters['frames'] += 1
+
+    async def stage(name):
+        last_frame_id = 0
+        while True:
+            packet = await channel.next_frame(last_frame_id)
+            if packet is None:
+                break
+            last_frame_id = packet.frame_id
+            with packet:
+                fake_stage_work(packet.image)
+                if name == "hand":
+                    packet.image.copy()  # 랜드마크 오버레이용
+                elif name == "yolo":
+                    packet.image[120:600, 480:800].copy()  # 크롭 영역만 오버레이용
+            counters['processed'] += 1
+            await asyncio.sleep(0)
+
+    await asyncio.gather(provider(), stage("depth"), stage("hand"), stage("yolo"))
+    capture_thread.stop()
+    counters['dropped'] = capture_thread.dropped
+    counters['pool_size'] = len(capture_thread.pool.buffers)
+
+
+def run(mode, frames, args):
+    capture = ReplayCapture(frames, args.fps * args.speed, int(args.minutes * 60 * args.fps))
+    counters = {'frames': 0, 'processed': 0}
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if mode == "copy":
+        asyncio.run(run_copy_mode(capture, counters))
+    else:
+        asyncio.run(run_pool_mode(capture, counters, args.width, args.height))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"== {mode} ==")
+    print(f"  frames published: {counters['frames']}, stage runs: {counters['processed']}")
+    if 'dropped' in counters:
+        print(f"  capture dropped: {counters['dropped']}, pool buffers: {counters['pool_size']}")
+    print(f"  traced memory: current={current / 2**20:.1f}MiB peak={peak / 2**20:.1f}MiB")
+    print(f"  max RSS so far: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MiB")
+    print(f"  cpu time: {cpu:.1f}s over {wall:.1f}s wall ({cpu / wall * 100:.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", default=None, help="재생할 녹화 영상 (없으면 합성 프레임)")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 배속")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--mode", choices=("copy", "pool", "both"), default="both")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.width, args.height)
+    modes = ("copy", "pool") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        run(mode, frames, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""스레드 모드 vs 프로세스 모드의 코어 수별 fps 벤치마크
+
+CPU 친화도(sched_setaffinity)로 사용할 코어 수를 1개부터 늘려가며,
+같은 파이프라인을 InferenceExecutor(스레드)와 ProcessInferenceExecutor(프로세스)로
+실행했을 때 스테이지별 처리 fps를 비교합니다.
+
+기본값은 GIL을 잡고 지정 시간만큼 연산하는 가짜 모델(파이썬 전처리/후처리 비중이 큰 경우)이고,
+--real을 주면 실제 MiDaS / MediaPipe Hands / YOLO 모델을 합성 프레임으로 실행합니다.
+
+사용 예:
+    python bench_multiproc.py --seconds 10 --max-cores 4
+    python bench_multiproc.py --real --seconds 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from executor import InferenceExecutor
+from frame_channel import FrameChannel
+from multiproc import ProcessInferenceExecutor
+
+STAGE_COST_MS = {"depth": 40, "hand": 15, "yolo": 30}
+
+
+class BusyModel:
+    """GIL을 잡은 채로 cost_ms 동안 연산하는 가짜 모델"""
+    def __init__(self, cost_ms):
+        self.cost = cost_ms / 1000
+
+    def infer(self, frame):
+        deadline = time.perf_counter() + self.cost
+        total = 0
+        while time.perf_counter() < deadline:
+            total += sum(range(200))
+        return int(frame[0, 0, 0]) + total % 2
+
+
+def register_models(executor, real):
+    if real:
+        from test_depth import setup_depth_model
+        from test_hand import create_hand_model
+        from test_detect import create_yolo_model
+        executor.register("depth", setup_depth_model)
+        executor.register("hand", create_hand_model)
+        executor.register("yolo", create_yolo_model)
+    else:
+        for stage, cost_ms in STAGE_COST_MS.items():
+            executor.register(stage, BusyModel, cost_ms)
+    executor.start()
+
+
+async def run_pipeline(mode, args):
+    """파이프라인을 args.seconds 동안 실행하고 스테이지별 처리 프레임 수를 반환합니다."""
+    shape = (args.height, args.width, 3)
+    stages = tuple(STAGE_COST_MS)
+    if mode == "process":
+        executor = ProcessInferenceExecutor(shape, stages=stages, max_pending=1)
+    else:
+        executor = InferenceExecutor(stages=stages, max_pending=1)
+    register_models(executor, args.real)
+
+    channel = FrameChannel()
+    frame = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+    counts = {stage: 0 for stage in stages}
+    running = True
+
+    async def provider():
+        while running:
+            channel.publish(frame)
+            await asyncio.sleep(1.0 / args.fps)
+
+    async def stage_loop(stage):
+        last_frame_id = 0
+        while running:
+            packet = await channel.next_frame(last_frame_id)
+            if packet is None:
+                break
+            last_frame_id = packet.frame_id
+            with packet:
+                await executor.infer(stage, packet)
+            counts[stage] += 1
+
+    tasks = [asyncio.create_task(provider())] + [asyncio.create_task(stage_loop(s)) for s in stages]
+    await asyncio.sleep(args.seconds)
+    running = False
+    channel.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    executor.shutdown()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30, help="카메라 프레임 공급 속도")
+    parser.add_argument("--max-cores", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--real", action="store_true", help="실제 모델 사용")
+    args = parser.parse_args()
+
+    if not hasattr(os, "sched_setaffinity"):
+        print("이 플랫폼은 CPU 친화도 설정을 지원하지 않아 전체 코어로만 측정합니다.")
+        core_counts = [os.cpu_count()]
+    else:
+        available = sorted(os.sched_getaffinity(0))
+        core_counts = list(range(1, min(args.max_cores, len(available)) + 1))
+        original = set(available)
+
+    print(f"{'cores':>5} {'mode':>8} " + " ".join(f"{s:>7}" for s in STAGE_COST_MS) + f" {'total':>7}")
+    for cores in core_counts:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(available[:cores]))  # 자식 프로세스/스레드가 상속
+        for mode in ("thread", "process"):
+            counts = asyncio.run(run_pipeline(mode, args))
+            fps = {stage: count / args.seconds for stage, count in counts.items()}
+            print(f"{cores:>5} {mode:>8} " + " ".join(f"{v:7.1f}" for v in fps.values())
+                  + f" {sum(fps.values()):7.1f}")
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, original)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""추론 오프로드 전/후 프레임 지연시간 비교 벤치마크
+
+실제 모델 대신 지정한 시간만큼 블로킹하는 가짜 모델(time.sleep, GIL 해제)을 사용해
+이벤트 루프 안에서 직접 추론하는 기존 방식(blocking)과 InferenceExecutor를 사용하는
+방식(offload)의 캡처→결과 지연시간과 이벤트 루프 지연(lag)을 비교합니다.
+
+사용 예:
+    python bench_offload.py --seconds 10 --depth-ms 40 --hand-ms 15 --yolo-ms 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from executor import InferenceExecutor
+
+
+def fake_model(duration):
+    """duration초 동안 블로킹하는 가짜 추론"""
+    def infer(frame):
+        time.sleep(duration)
+        return frame
+    return infer
+
+
+async def frame_provider(shared_data, fps):
+    """고정 fps로 (프레임 ID, 캡처 시각)을 공급합니다."""
+    frame_id = 0
+    period = 1.0 / fps
+    while shared_data['running']:
+        frame_id += 1
+        shared_data['frame'] = (frame_id, time.perf_counter())
+        await asyncio.sleep(period)
+
+
+async def stage_loop(name, model, shared_data, latencies, executor=None):
+    """스테이지 루프: 최신 프레임을 추론하고 캡처→결과 지연을 기록합니다."""
+    while shared_data['running']:
+        frame = shared_data['frame']
+        if frame is None:
+            await asyncio.sleep(0.001)
+            continue
+        if executor is None:
+            model(frame)  # 기존 방식: 이벤트 루프에서 직접 블로킹
+        else:
+            await executor.run(name, model, frame)
+        latencies[name].append(time.perf_counter() - frame[1])
+        await asyncio.sleep(0)
+
+
+async def loop_lag_probe(shared_data, lags, interval=0.01):
+    """이벤트 루프 응답성 측정 (FlagMonitor 같은 조율 작업의 지연)"""
+    while shared_data['running']:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_mode(mode, args):
+    durations = {"depth": args.depth_ms / 1000, "hand": args.hand_ms / 1000, "yolo": args.yolo_ms / 1000}
+    shared_data = {'frame': None, 'running': True}
+    latencies = {name: [] for name in durations}
+    lags = []
+    executor = InferenceExecutor(stages=tuple(durations), max_pending=1) if mode == "offload" else None
+
+    tasks = [asyncio.create_task(frame_provider(shared_data, args.fps)),
+             asyncio.create_task(loop_lag_probe(shared_data, lags))]
+    for name, duration in durations.items():
+        tasks.append(asyncio.create_task(
+            stage_loop(name, fake_model(duration), shared_data, latencies, executor)))
+
+    await asyncio.sleep(args.seconds)
+    shared_data['running'] = False
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if executor is not None:
+        executor.shutdown()
+    return latencies, lags
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def print_report(mode, latencies, lags):
+    print(f"== {mode} ==")
+    worst = []
+    for name, values in latencies.items():
+        print(f"  {name:5s}: frames={len(values):4d} "
+              f"mean={statistics.mean(values) * 1000:6.1f}ms p95={percentile(values, 0.95) * 1000:6.1f}ms")
+        worst.append(statistics.mean(values))
+    print(f"  end-to-end (slowest stage mean): {max(worst) * 1000:.1f}ms")
+    print(f"  event loop lag: mean={statistics.mean(lags) * 1000:.1f}ms max={max(lags) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--depth-ms", type=float, default=40)
+    parser.add_argument("--hand-ms", type=float, default=15)
+    parser.add_argument("--yolo-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    for mode in ("blocking", "offload"):
+        latencies, lags = asyncio.run(run_mode(mode, args))
+        print_report(mode, latencies, lags)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""뎁스 섹션 분석 마이크로 벤치마크
+
+기존 중첩 루프 방식(섹션마다 section.mean(), 표시용으로 1280x720 리사이즈 후 재계산)과
+compute_section_stats 기반 방식(모델 해상도에서 한 번에 계산, 결정/오버레이 공유)을 비교합니다.
+
+사용 예:
+    python bench_sections.py --size 256 --rows 5 --cols 5
+"""
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from test_depth import compute_section_stats, decide_direction, display_depth_sections
+
+
+def legacy_process(depth_map, num_rows, num_cols, threshold):
+    h, w = depth_map.shape
+    section_height, section_width = h // num_rows, w // num_cols
+    left_count = right_count = 0
+    for row in range(num_rows):
+        for col in range(num_cols):
+            section = depth_map[row * section_height:(row + 1) * section_height,
+                                col * section_width:(col + 1) * section_width]
+            if section.mean() >= threshold:
+                if col < num_cols // 2:
+                    left_count += 1
+                else:
+                    right_count += 1
+    return left_count, right_count
+
+
+def legacy_display_means(depth_map, num_rows, num_cols, output_width=1280, output_height=720):
+    depth_map = cv2.resize(depth_map, (output_width, output_height))
+    section_height, section_width = output_height // num_rows, output_width // num_cols
+    return [depth_map[row * section_height:(row + 1) * section_height,
+                      col * section_width:(col + 1) * section_width].mean()
+            for row in range(num_rows) for col in range(num_cols)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=256, help="모델 출력 해상도 (정사각형)")
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    depth_map = np.random.default_rng(0).random((args.size, args.size), dtype=np.float32)
+    image = np.zeros((args.size, args.size, 3), dtype=np.uint8)
+    rows, cols, n = args.rows, args.cols, args.number
+
+    cases = {
+        "legacy decision (loops)": lambda: legacy_process(depth_map, rows, cols, 0.8),
+        "legacy overlay means (resize+loops)": lambda: legacy_display_means(depth_map, rows, cols),
+        "stats (means/min/max)": lambda: compute_section_stats(depth_map, rows, cols),
+        "stats + decision": lambda: decide_direction(compute_section_stats(depth_map, rows, cols), 0.8),
+        "stats + p10/p90": lambda: compute_section_stats(depth_map, rows, cols, percentiles=(10, 90)),
+    }
+    for name, func in cases.items():
+        per_call = timeit.timeit(func, number=n) / n
+        print(f"{name:38s} {per_call * 1e6:9.1f} us")
+
+    stats = compute_section_stats(depth_map, rows, cols)
+    per_call = timeit.timeit(lambda: display_depth_sections(image, depth_map, stats=stats), number=n // 10) / (n // 10)
+    print(f"{'overlay drawing (shared stats)':38s} {per_call * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
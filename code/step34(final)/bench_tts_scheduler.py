@@ -0,0 +1,200 @@
+"""TTS 메시지 스케줄링 비교 벤치마크 (가짜 재생 장치, 폭주 부하)
+
+  - legacy   : 기존 TextToSpeech 큐의 복제 (FIFO, `text not in queue` 중복 검사, 회피 안내 5초 제한, 끼어들기 없음)
+  - scheduler: 실제 TextToSpeech (speak()의 우선순위 판단 / 회피 안내 key / 5초 제한, _process_queue,
+               _say의 캐시 재생과 끼어들기 경로, SpeechScheduler)
+
+오디오 장치 없이 문장 길이에 비례한 시간(--ms-per-char)만큼 "재생"하는 가짜 장치를 사용하고,
+scheduler 쪽은 같은 길이의 무음 WAV를 만드는 가짜 엔진을 TextToSpeech에 넣어 실제 코드 경로로 측정합니다.
+부하는 회피 안내 폭주, 여러 제품 안내 묶음, 정보 안내가 섞인 같은 시나리오(시드 고정)를 두 방식에 보냅니다.
+우선순위별 큐 대기 시간(mean/p95/max), 말한 수, 유효 시간이 지나 늦게 말한 수(legacy) 또는 버린 수를 출력합니다.
+
+사용 예:
+    python bench_tts_scheduler.py --seconds 20 --ms-per-char 70
+"""
+import argparse
+import queue
+import random
+import tempfile
+import threading
+import time
+import wave
+
+from speech import INFO, OBSTACLE, PRIORITY_NAMES, PRODUCT, DEFAULT_DEADLINES, classify
+from tts import TextToSpeech
+
+SAMPLE_RATE = 8000
+
+
+class FakeEngine:
+    """pyttsx3 엔진 대신 문장 길이 x ms_per_char 길이의 무음 WAV를 만드는 엔진"""
+    def __init__(self, ms_per_char):
+        self.seconds_per_char = ms_per_char / 1000
+        self.properties = {"rate": 150, "volume": 0.9, "voice": "fake", "voices": []}
+        self.jobs = []
+        self.callbacks = {}  # 알림 이름 -> [콜백]
+
+    def connect(self, topic, callback):
+        self.callbacks.setdefault(topic, []).append(callback)
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def save_to_file(self, text, path):
+        self.jobs.append((text, path))
+
+    def say(self, text):
+        self.jobs.append((text, None))
+
+    def runAndWait(self):
+        for text, path in self.jobs:
+            if path is None:  # 재생 장치 없이 말하기 (이 벤치에서는 쓰지 않음)
+                for callback in self.callbacks.get('started-utterance', []):
+                    callback(None)
+                time.sleep(len(text) * self.seconds_per_char)
+                continue
+            with wave.open(path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(SAMPLE_RATE)
+                f.writeframes(bytes(2 * int(len(text) * self.seconds_per_char * SAMPLE_RATE)))
+        self.jobs = []
+
+
+class FakeSink:
+    """문장 길이 x ms_per_char 동안 재생하는 척하는 장치 (stop()으로 바로 끊김, reset()까지 유지)"""
+    mixes = True
+
+    def __init__(self, ms_per_char):
+        self.seconds_per_char = ms_per_char / 1000
+        self.stopped = threading.Event()
+
+    def play(self, clip):
+        duration = clip.duration if hasattr(clip, "duration") else len(clip) * self.seconds_per_char
+        self.stopped.wait(duration)
+        return True
+
+    def stop(self):
+        self.stopped.set()
+
+    def reset(self):
+        self.stopped.clear()
+
+
+def make_workload(seconds, seed=0):
+    """(시각, 문장) 목록: 2~4초마다 회피 안내 폭주, 제품 안내 묶음, 가끔 정보 안내"""
+    rng = random.Random(seed)
+    products = ["cola", "cider", "chips", "ramen", "milk", "water"]
+    events, t = [], 0.0
+    while t < seconds:
+        kind = rng.random()
+        if kind < 0.4:  # 회피 안내: 깊이 스테이지가 프레임마다 같은 판단을 반복
+            direction = rng.choice(["Right", "Left"])
+            events += [(t + i * 0.05, f"Avoid to {direction}") for i in range(rng.randint(5, 20))]
+        elif kind < 0.85:  # 여러 손/트랙에서 제품 안내가 한꺼번에
+            events += [(t + i * 0.1, f"{rng.choice(products)} catch") for i in range(rng.randint(2, 5))]
+        else:
+            events.append((t, "Camera connected"))
+        t += rng.uniform(0.5, 2.0)
+    return sorted(events)
+
+
+def replay(workload, put):
+    start = time.perf_counter()
+    for t, text in workload:
+        delay = start + t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        put(text)
+
+
+def run_legacy(workload, sink, gap):
+    """기존 방식: FIFO 큐 + 선형 중복 검사, 재생 중에는 끊지 않음 (회피 안내 5초 제한은 TextToSpeech.speak와 같음)"""
+    q = queue.Queue()
+    delays = {p: [] for p in PRIORITY_NAMES}
+    late = {p: 0 for p in PRIORITY_NAMES}
+    enqueued = {}
+    last_avoid_time = [0.0]
+    done = threading.Event()
+
+    def put(text):
+        if "Avoid" in text:  # 두 방식이 큐 처리와 끼어들기만 다르도록 같은 제한 적용
+            current_time = time.time()
+            if current_time - last_avoid_time[0] < 5:
+                return
+            last_avoid_time[0] = current_time
+        if text not in q.queue:
+            enqueued.setdefault(text, []).append(time.perf_counter())
+            q.put(text)
+
+    def player():
+        while not (done.is_set() and q.empty()):
+            try:
+                text = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            priority = classify(text)
+            delay = time.perf_counter() - enqueued[text].pop(0)
+            delays[priority].append(delay)
+            late[priority] += delay > DEFAULT_DEADLINES[priority]
+            sink.reset()
+            sink.play(text)
+            time.sleep(gap)
+
+    thread = threading.Thread(target=player)
+    thread.start()
+    replay(workload, put)
+    done.set()
+    thread.join()
+    return delays, late
+
+
+def run_tts(workload, ms_per_char, gap):
+    """실제 TextToSpeech로 같은 부하를 재생합니다 (미리 합성은 시작 시 한 번)."""
+    tts = TextToSpeech(cache_dir=tempfile.mkdtemp(), sink=FakeSink(ms_per_char), engine=FakeEngine(ms_per_char))
+    tts.gap = gap
+    tts.prepare(sorted({text for _, text in workload}))
+    replay(workload, tts.speak)
+    while tts.scheduler.pending() or tts.is_tts_busy:  # 남은 메시지를 모두 처리할 때까지
+        time.sleep(0.05)
+    tts.scheduler.close()
+    tts.tts_thread.join()
+    return tts
+
+
+def print_delays(name, delays, extra):
+    for priority in (OBSTACLE, PRODUCT, INFO):
+        values = sorted(d * 1000 for d in delays[priority])
+        if not values:
+            continue
+        print(f"{name:9s} {PRIORITY_NAMES[priority]:8s} n={len(values):3d} mean={sum(values) / len(values):7.1f}ms "
+              f"p95={values[int(len(values) * 0.95)]:7.1f}ms max={values[-1]:7.1f}ms {extra[priority]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20, help="부하 시나리오 길이")
+    parser.add_argument("--ms-per-char", type=float, default=70, help="가짜 재생 시간 (문장 글자당)")
+    parser.add_argument("--gap", type=float, default=0.1, help="메시지 간 간격 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workload = make_workload(args.seconds, args.seed)
+    print(f"{len(workload)} requests over {args.seconds:.0f}s")
+
+    delays, late = run_legacy(workload, FakeSink(args.ms_per_char), args.gap)
+    print_delays("legacy", delays, {p: f"late={late[p]}" for p in PRIORITY_NAMES})
+
+    tts = run_tts(workload, args.ms_per_char, args.gap)
+    stats = tts.scheduler.stats
+    print_delays("scheduler", {p: s.delays for p, s in stats.items()},
+                 {p: f"expired={s.expired} coalesced={s.coalesced} preempted={s.preempted}" for p, s in stats.items()})
+    print()
+    tts.report()  # 큐 추가부터 재생 시작까지 (재생 장치 경로)
+
+
+if __name__ == "__main__":
+    main()
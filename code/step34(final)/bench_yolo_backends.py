@@ -0,0 +1,106 @@
+"""YOLO 백엔드 비교 벤치마크 (ultralytics/PyTorch vs OpenVINO IR)
+
+녹화 영상의 각 프레임에서 탐지기와 같은 중앙 320x480 영역을 잘라 두 백엔드로 추론하고
+다음을 비교합니다. 각 백엔드는 별도 프로세스에서 실행하여 import/메모리를 독립적으로 측정합니다.
+  - 로드 시간 (import + 모델 로드), 프레임당 지연시간 (mean/p95), 최대 RSS
+  - 정확도: ultralytics 결과를 기준으로 같은 클래스 & IoU >= 0.5 매칭의 precision/recall,
+    프레임별 최고 점수 클래스 일치율
+
+사용 예:
+    python bench_yolo_backends.py --video session.mp4 --frames 300
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from tracker import box_iou
+
+
+def load_crops(video, max_frames):
+    cap = cv2.VideoCapture(video)
+    crops = []
+    while len(crops) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        x, y = (w - 320) // 2, (h - 480) // 2
+        crops.append(np.ascontiguousarray(frame[y:y + 480, x:x + 320]))
+    cap.release()
+    if not crops:
+        raise ValueError(f"영상을 읽을 수 없습니다: {video}")
+    return crops
+
+
+def run_backend(backend, video, max_frames, results):
+    """백엔드 하나를 새 프로세스에서 로드/실행하고 측정값을 results 큐로 보냅니다."""
+    crops = load_crops(video, max_frames)
+    start = time.perf_counter()
+    from test_detect import create_yolo_model
+    model = create_yolo_model(backend=backend)
+    load_time = time.perf_counter() - start
+
+    model.infer(crops[0])  # 워밍업
+    timings, detections = [], []
+    for crop in crops:
+        t0 = time.perf_counter()
+        boxes, scores, classes = model.infer(crop)
+        timings.append((time.perf_counter() - t0) * 1000)
+        detections.append((np.asarray(boxes), np.asarray(scores), np.asarray(classes)))
+    rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((backend, load_time, timings, rss_mib, detections))
+
+
+def compare(reference, candidate, iou_threshold=0.5):
+    """기준 대비 후보 탐지의 매칭 수 / 기준 수 / 후보 수 / 최고 클래스 일치 프레임 수"""
+    matched = total_ref = total_cand = top1_agree = 0
+    for (ref_boxes, ref_scores, ref_cls), (boxes, scores, cls) in zip(reference, candidate):
+        total_ref += len(ref_boxes)
+        total_cand += len(boxes)
+        ref_top = int(ref_cls[ref_scores.argmax()]) if len(ref_scores) else None
+        cand_top = int(cls[scores.argmax()]) if len(scores) else None
+        top1_agree += ref_top == cand_top
+        if len(ref_boxes) and len(boxes):
+            iou = box_iou(ref_boxes, boxes)
+            iou[ref_cls[:, None] != cls[None, :]] = 0
+            used = set()
+            for i in range(len(ref_boxes)):
+                j = int(iou[i].argmax())
+                if iou[i, j] >= iou_threshold and j not in used:
+                    used.add(j)
+                    matched += 1
+    return matched, total_ref, total_cand, top1_agree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", required=True, help="녹화 영상 경로")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    measurements = {}
+    for backend in ("ultralytics", "openvino"):
+        results = ctx.Queue()
+        process = ctx.Process(target=run_backend, args=(backend, args.video, args.frames, results))
+        process.start()
+        name, load_time, timings, rss_mib, detections = results.get()
+        process.join()
+        measurements[name] = detections
+        timings.sort()
+        print(f"{name:12s} load={load_time:5.2f}s mean={statistics.mean(timings):6.2f}ms "
+              f"p95={timings[int(len(timings) * 0.95)]:6.2f}ms maxRSS={rss_mib:7.1f}MiB")
+
+    matched, total_ref, total_cand, top1 = compare(measurements["ultralytics"], measurements["openvino"])
+    frames = len(measurements["ultralytics"])
+    print(f"accuracy vs ultralytics: recall={matched / max(total_ref, 1):.3f} "
+          f"precision={matched / max(total_cand, 1):.3f} top-1 class agreement={top1 / max(frames, 1):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+
+# 실행 설정 (환경 변수로 덮어쓸 수 있음)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 결과 창 표시 여부 (0이면 오버레이 그리기와 imshow를 생략, 화면 없는 장치용)
+DISPLAY = os.environ.get("CHORONG_DISPLAY", "1") != "0"
+
+# OpenVINO 추론 장치: CPU / GPU / AUTO (AUTO는 사용 가능한 장치를 자동 선택)
+OV_DEVICE = os.environ.get("CHORONG_OV_DEVICE", "AUTO")
+
+# OpenVINO 성능 힌트: LATENCY (프레임당 지연 최소화) / THROUGHPUT (처리량 최대화)
+OV_PERFORMANCE_HINT = os.environ.get("CHORONG_OV_HINT", "LATENCY")
+
+# 컴파일된 모델 캐시 경로 (빈 문자열이면 캐시 사용 안 함)
+OV_CACHE_DIR = os.environ.get("CHORONG_OV_CACHE_DIR", os.path.join(current_dir, "model", "cache"))
+
+# 모델 정밀도: FP32 / INT8 (INT8은 quantize.py로 만든 모델이 있을 때만 적용)
+MODEL_PRECISION = os.environ.get("CHORONG_MODEL_PRECISION", "FP32").upper()
+
+# 잡기로 판정할 제스처 (gestures.default_rules 이름, 쉼표로 구분, 하나라도 참이면 잡기)
+GRASP_GESTURES = tuple(g.strip() for g in os.environ.get("CHORONG_GRASP_GESTURES", "pinky_fold").split(",") if g.strip())
+
+# 손목-중지 끝 최소 길이 (정규화 좌표, 0이면 손 크기 필터 사용 안 함. HAND 프로토타입은 0.3)
+MIN_HAND_LENGTH = float(os.environ.get("CHORONG_MIN_HAND_LENGTH", "0"))
+
+# 손목/손가락 끝의 상대 깊이(MiDaS [0, 1], 클수록 가까움)가 이 값 미만인 손은 멀리 있는 손으로 보고 제외 (0이면 사용 안 함)
+HAND_NEAR_DEPTH = float(os.environ.get("CHORONG_HAND_NEAR_DEPTH", "0.5"))
+
+# 손 랜드마크 백엔드: solutions (mp.solutions.hands, 동기) / tasks (HandLandmarker LIVE_STREAM, 콜백)
+HAND_BACKEND = os.environ.get("CHORONG_HAND_BACKEND", "solutions")
+
+# YOLO 백엔드: auto (OpenVINO IR이 있으면 사용) / openvino / ultralytics
+YOLO_BACKEND = os.environ.get("CHORONG_YOLO_BACKEND", "auto")
+
+# YOLO 탐지기 최대 실행 간격 (프레임). 사이 프레임은 추적기로 유지하며, 1이면 매 프레임 탐지
+DETECT_MAX_INTERVAL = int(os.environ.get("CHORONG_DETECT_MAX_INTERVAL", "8"))
+
+# YOLO 탐지 영역: hand (잡고 있는 손 주변, 손이 없으면 중앙) / center (항상 중앙 320x480)
+DETECT_ROI = os.environ.get("CHORONG_DETECT_ROI", "hand")
+
+# 스테이지 게이팅 (gating.py): 0이면 모든 스테이지를 매 프레임 실행
+GATING = os.environ.get("CHORONG_GATING", "1") != "0"
+
+# YOLO 실행 조건: hand (손이 보일 때) / grasp (손이 물체를 잡고 있을 때, 가장 적게 실행)
+YOLO_GATE = os.environ.get("CHORONG_YOLO_GATE", "hand")
+
+# YOLO는 최근 이 시간(초) 안에 손이 보였을 때(또는 잡고 있을 때)만 실행
+YOLO_HAND_WINDOW = float(os.environ.get("CHORONG_YOLO_HAND_WINDOW", "0.5"))
+
+# 정지 상태(장면 움직임 없음)일 때 depth 실행 빈도 (Hz)
+DEPTH_IDLE_RATE = float(os.environ.get("CHORONG_DEPTH_IDLE_RATE", "2"))
+
+# 스테이지별 CPU 예산 (워커가 사용하는 코어 비율, 예: "depth=1.0,yolo=0.5"). 비어 있으면 제한 없음
+STAGE_CPU_BUDGET = {
+    stage.strip(): float(value)
+    for stage, _, value in (item.partition("=") for item in os.environ.get("CHORONG_STAGE_CPU_BUDGET", "").split(","))
+    if value
+}
+
+# 미리 합성한 TTS 문장 캐시 위치 (문장/음성/속도/볼륨별 WAV). 비우면 매번 실시간 합성
+TTS_CACHE_DIR = os.environ.get("CHORONG_TTS_CACHE_DIR", os.path.join(current_dir, "model", "tts_cache"))
+
+# 캐시된 문장 재생 장치: auto / sounddevice / winsound / command / none (none이면 pyttsx3로 바로 말하기)
+AUDIO_SINK = os.environ.get("CHORONG_AUDIO_SINK", "auto")
+
+# 장애물 안내 방식: speech ("Avoid to ..." 음성, 5초에 한 번) / tone (좌우 신호음, 초당 여러 번) / both
+OBSTACLE_FEEDBACK = os.environ.get("CHORONG_OBSTACLE_FEEDBACK", "speech")
+
+# 잡기와 제품 감지를 같은 사건으로 묶는 최대 시간 차이 (초, fusion.py)
+FUSION_WINDOW = float(os.environ.get("CHORONG_FUSION_WINDOW", "1.0"))
+
+# 이벤트(잡기/감지/플래그)를 터미널에 출력할지 여부
+EVENT_LOG = os.environ.get("CHORONG_EVENT_LOG", "1") != "0"
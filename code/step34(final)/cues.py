@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from audio import AudioClip
+
+
+class ToneBank:
+    """좌우 위치(pan) x 가까움 단계(level)별 짧은 스테레오 신호음을 시작할 때 한 번 만들어 둡니다.
+
+    가까울수록 높은 음(low_hz -> high_hz)이며, 좌우는 등전력 패닝입니다.
+    재생할 때는 만들어 둔 int16 배열을 고르기만 하므로 합성 비용이 없습니다.
+    cache_dir가 주어지면 파일로 재생하는 장치(winsound, aplay)를 위해 WAV로도 저장합니다.
+    """
+    def __init__(self, pans=5, levels=4, sample_rate=22050, duration=0.08, low_hz=440.0, high_hz=1320.0,
+                 volume=0.4, cache_dir=None):
+        self.pans = pans
+        self.levels = levels
+        self.sample_rate = sample_rate
+        t = np.arange(int(sample_rate * duration)) / sample_rate
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.01)  # 10ms 페이드 인/아웃 (클릭음 방지)
+        angles = (np.linspace(-1.0, 1.0, pans) + 1) * np.pi / 4  # -1(왼쪽) ~ 1(오른쪽)
+        gains = np.stack([np.cos(angles), np.sin(angles)], axis=1)  # (pans, 2)
+        freqs = np.geomspace(low_hz, high_hz, levels)
+        mono = np.sin(2 * np.pi * freqs[:, None] * t[None, :]) * fade * volume  # (levels, samples)
+        waves = (mono[None, :, :, None] * gains[:, None, None, :] * 32767).astype(np.int16)
+        paths = self.save(waves, cache_dir) if cache_dir else None
+        self.clips = [[AudioClip(waves[p, l], sample_rate, paths and paths[p][l]) for l in range(levels)]
+                      for p in range(pans)]
+
+    def save(self, waves, cache_dir):
+        directory = os.path.join(cache_dir, "tones")
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for p, row in enumerate(waves):
+            paths.append([])
+            for l, samples in enumerate(row):
+                path = os.path.join(directory, f"tone_{self.sample_rate}_{p}of{self.pans}_{l}of{self.levels}.wav")
+                if not os.path.exists(path):
+                    with wave.open(path, "wb") as f:
+                        f.setnchannels(2)
+                        f.setsampwidth(2)
+                        f.setframerate(self.sample_rate)
+                        f.writeframes(samples.tobytes())
+                paths[-1].append(path)
+        return paths
+
+    def clip(self, pan, proximity):
+        """pan: -1(왼쪽) ~ 1(오른쪽), proximity: 0(임계값) ~ 1(가장 가까움)"""
+        p = round((min(max(pan, -1.0), 1.0) + 1) / 2 * (self.pans - 1))
+        l = round(min(max(proximity, 0.0), 1.0) * (self.levels - 1))
+        return self.clips[p][l]
+
+
+def obstacle_cue(stats, threshold=0.85):
+    """섹션 통계에서 장애물 위치와 가까움을 구합니다. (pan, proximity) 또는 None
+
+    pan은 threshold 이상 섹션들의 가까움 가중 열 중심(-1 왼쪽 ~ 1 오른쪽)으로, 신호음은 장애물 쪽에서 들립니다.
+    proximity는 가장 가까운 섹션 평균을 threshold~1 범위에서 0~1로 바꾼 값입니다.
+    """
+    hot = stats.means >= threshold
+    if not hot.any():
+        return None
+    num_cols = hot.shape[1]
+    weights = np.where(hot, stats.means - threshold + 1e-3, 0).sum(axis=0)  # 열별 가중치
+    columns = np.linspace(-1.0, 1.0, num_cols)
+    pan = float((weights * columns).sum() / weights.sum())
+    proximity = float((stats.means[hot].max() - threshold) / max(1.0 - threshold, 1e-6))
+    return pan, proximity
+
+
+class CuePlayer:
+    """최신 장애물 신호를 일정 간격으로 재생하는 스레드
+
+    update()는 최신 값만 바꾸므로 깊이 스테이지 속도와 관계없이 호출할 수 있고, 재생 간격은
+    가까울수록 짧아집니다 (slow_interval -> fast_interval). max_age초 동안 갱신이 없으면 조용해집니다.
+    """
+    def __init__(self, sink, bank=None, fast_interval=0.12, slow_interval=0.5, max_age=1.0):
+        self.sink = sink
+        self.bank = ToneBank() if bank is None else bank
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.max_age = max_age
+        self.cue = None  # (pan, proximity, 갱신 시각)
+        self.changed = threading.Event()
+        self.running = True
+        self.played = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def update(self, cue):
+        """obstacle_cue() 결과 (None이면 조용히)"""
+        self.cue = None if cue is None else (cue[0], cue[1], time.perf_counter())
+        self.changed.set()  # 조용하던 중이면 바로 재생
+
+    def _run(self):
+        while self.running:
+            cue = self.cue
+            if cue is None or time.perf_counter() - cue[2] > self.max_age:
+                self.changed.wait(self.max_age)
+                self.changed.clear()
+                continue
+            pan, proximity, _ = cue
+            start = time.perf_counter()
+            try:
+                self.sink.play(self.bank.clip(pan, proximity))
+            except Exception as e:  # 재생 장치 오류가 나면 신호음만 끄고 음성 안내는 계속
+                print(f"Tone cues stopped: {e}")
+                self.running = False
+                break
+            self.played += 1
+            interval = self.slow_interval + (self.fast_interval - self.slow_interval) * min(max(proximity, 0.0), 1.0)
+            self.changed.clear()
+            remaining = interval - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def close(self):
+        self.running = False
+        self.changed.set()
+        self.thread.join(timeout=1.0)
+        if hasattr(self.sink, "close"):  # SoundDeviceSink의 출력 스트림
+            self.sink.close()
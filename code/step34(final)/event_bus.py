@@ -0,0 +1,61 @@
+from datetime import datetime
+
+
+class FlagEvent:
+    """상태 플래그 변화 ("catch": 잡고 있는 손이 있음)"""
+    __slots__ = ("name", "active", "frame_id", "timestamp")
+
+    def __init__(self, name, active, frame_id, timestamp):
+        self.name = name
+        self.active = active
+        self.frame_id = frame_id
+        self.timestamp = timestamp  # 원인이 된 프레임의 캡처 시각 (time.perf_counter 기준)
+
+
+class TrackEvent:
+    """키프레임에서 탐지와 다시 매칭된 트랙 (마지막으로 본 박스와 시각)"""
+    __slots__ = ("class_id", "class_name", "confidence", "track_id", "frame_id", "timestamp", "box")
+
+    def __init__(self, class_id, class_name, confidence, track_id, frame_id, timestamp, box=None):
+        self.class_id = class_id
+        self.class_name = class_name
+        self.confidence = confidence
+        self.track_id = track_id
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.box = box  # 트랙 박스 (xyxy, 전체 프레임 픽셀 좌표)
+
+
+class DetectionEvent(TrackEvent):
+    """새로 확정된 제품 감지 (트랙 ID별 한 번, TrackEvent 리스너도 받음)"""
+    __slots__ = ()
+
+
+class EventBus:
+    """이벤트 루프 안에서 쓰는 타입 기반 publish/listener 버스
+
+    add_listener()로 등록한 콜백은 publish(event) 안에서 event의 타입(isinstance)이 일치하면
+    동기로 호출되므로 별도 큐나 폴링이 없습니다 (리스너는 가볍게 유지).
+    이벤트 루프 스레드에서만 호출해야 합니다.
+    """
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, callback, *event_types):
+        self.listeners.append((event_types, callback))
+
+    def publish(self, event):
+        for event_types, callback in self.listeners:
+            if isinstance(event, event_types):
+                callback(event)
+
+
+def print_event(event):
+    """이벤트를 터미널에 출력하는 리스너 (config.EVENT_LOG일 때 등록)"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(event, DetectionEvent):
+        print(f"[{now}] Detected: {event.class_name} ({event.confidence:.2f}) #{event.track_id}")
+    elif isinstance(event, FlagEvent):
+        print(f"[{now}] {event.name} flag {'on' if event.active else 'off'} (frame {event.frame_id})")
+    else:
+        print(f"[{now}] {event!r}")
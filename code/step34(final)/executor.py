@@ -0,0 +1,142 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class StageStats:
+    """스테이지별 추론 호출 통계"""
+    def __init__(self):
+        self.calls = 0  # 완료된 추론 횟수
+        self.busy_time = 0.0  # 워커에서 추론에 사용한 누적 시간 (초)
+        self.wait_time = 0.0  # 백프레셔로 대기한 누적 시간 (초)
+
+    def summary(self):
+        avg_ms = (self.busy_time / self.calls * 1000) if self.calls else 0.0
+        return f"calls={self.calls} avg={avg_ms:.1f}ms wait={self.wait_time:.2f}s"
+
+
+class InferenceExecutor:
+    """모델별 전용 워커 스레드에서 블로킹 추론을 실행하는 실행 계층
+
+    이벤트 루프는 조율만 담당하고, 각 스테이지(depth, hand, yolo)의 추론은
+    스테이지마다 하나씩 있는 워커 스레드에서 실행됩니다.
+    스테이지별 대기 가능한 요청 수는 max_pending으로 제한됩니다 (백프레셔).
+    max_pending에 {스테이지: 개수} 딕셔너리를 주면 스테이지마다 다르게 설정할 수 있습니다.
+
+    모델은 register()로 등록한 팩토리를 통해 해당 스테이지의 워커에서 생성되며,
+    infer()는 그 모델의 infer(frame)를 호출합니다. 모델이 infer_async(frame, on_done)를
+    제공하면 워커는 제출만 하고, 완료 콜백이 올 때까지 슬롯을 점유합니다. 모델에 result_timeout(초)이
+    있으면 그 안에 콜백이 오지 않은 요청은 model.expire(요청 ID)의 결과로 끝냅니다. 같은 인터페이스를 가진
+    ProcessInferenceExecutor(multiproc.py)로 바꾸면 스테이지별 프로세스에서 실행됩니다.
+    """
+    def __init__(self, stages=("depth", "hand", "yolo"), max_pending=1):
+        if isinstance(max_pending, dict):
+            self.limits = {stage: max_pending.get(stage, 1) for stage in stages}
+        else:
+            self.limits = {stage: max_pending for stage in stages}
+        self.workers = {
+            stage: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"infer-{stage}")
+            for stage in stages
+        }
+        self.slots = {stage: asyncio.Semaphore(self.limits[stage]) for stage in stages}
+        self.stats = {stage: StageStats() for stage in stages}
+        self.models = {}  # 스테이지 -> 워커에서 생성된 모델
+        self.info = {}  # 스테이지 -> 모델 정보 (model.describe())
+        self._loading = {}
+
+    def register(self, stage, factory, *args):
+        """스테이지 전용 워커에서 factory(*args)로 모델을 생성합니다 (모델은 그 워커에서만 사용)."""
+        self._loading[stage] = self.workers[stage].submit(factory, *args)
+
+    def start(self):
+        """등록된 모델이 모두 생성될 때까지 기다립니다."""
+        for stage, future in self._loading.items():
+            model = future.result()
+            self.models[stage] = model
+            self.info[stage] = model.describe() if hasattr(model, "describe") else {}
+        self._loading.clear()
+
+    async def infer(self, stage, packet, roi=None):
+        """등록된 모델로 패킷의 프레임(roi가 있으면 (x1, y1, x2, y2) 영역)을 추론합니다."""
+        image = packet.image
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            image = image[y1:y2, x1:x2]
+        model = self.models[stage]
+        if hasattr(model, "infer_async"):
+            return await self._infer_async(stage, model, image)
+        return await self.run(stage, model.infer, image)
+
+    async def _infer_async(self, stage, model, image):
+        """워커에서 비동기 추론을 제출하고, 완료 콜백(또는 result_timeout)까지 스테이지 슬롯을 점유합니다."""
+        stats = self.stats[stage]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_done(result, error):  # 모델의 콜백 스레드에서 호출됨
+            loop.call_soon_threadsafe(self._complete, future, result, error)
+
+        wait_start = time.perf_counter()
+        async with self.slots[stage]:
+            start = time.perf_counter()
+            stats.wait_time += start - wait_start
+            request_id = await loop.run_in_executor(self.workers[stage], model.infer_async, image, on_done)
+            try:
+                # 콜백이 오지 않으면(예: 모델이 바쁜 동안 건너뛴 프레임) 슬롯이 영원히 묶이지 않도록 기한을 둠
+                return await asyncio.wait_for(future, getattr(model, "result_timeout", None))
+            except asyncio.TimeoutError:
+                return model.expire(request_id)
+            finally:
+                stats.busy_time += time.perf_counter() - start
+                stats.calls += 1
+
+    @staticmethod
+    def _complete(future, result, error):
+        if future.done():  # 취소된 요청
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def run(self, stage, func, *args, **kwargs):
+        """스테이지 전용 워커에서 func를 실행하고 결과를 반환합니다."""
+        if stage not in self.workers:
+            raise KeyError(f"등록되지 않은 스테이지입니다: {stage}")
+
+        stats = self.stats[stage]
+        wait_start = time.perf_counter()
+        async with self.slots[stage]:  # 대기 요청이 max_pending을 넘으면 여기서 대기
+            stats.wait_time += time.perf_counter() - wait_start
+            loop = asyncio.get_running_loop()
+            call = partial(self._timed_call, stats, func, *args, **kwargs)
+            return await loop.run_in_executor(self.workers[stage], call)
+
+    async def post(self, stage, func, *args):
+        """스테이지 워커에서 후처리 func를 실행합니다 (슬롯을 점유하지 않아 진행 중인 추론과 겹칠 수 있음)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.workers[stage], partial(func, *args))
+
+    @staticmethod
+    def _timed_call(stats, func, *args, **kwargs):
+        """워커 스레드에서 실행되며 추론 시간을 기록합니다."""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.busy_time += time.perf_counter() - start
+            stats.calls += 1
+
+    def report(self):
+        """스테이지별 통계를 출력합니다."""
+        for stage, stats in self.stats.items():
+            print(f"[executor] {stage}: {stats.summary()}")
+            model = self.models.get(stage)
+            if hasattr(model, "report"):
+                model.report()
+
+    def shutdown(self):
+        """모든 워커 스레드를 종료합니다 (대기 중인 작업은 취소)."""
+        for worker in self.workers.values():
+            worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,29 @@
+"""YOLO 가중치(.pt)를 OpenVINO IR로 내보냅니다.
+
+내보낸 <이름>_openvino_model 폴더가 있으면 create_yolo_model()이 PyTorch 없이
+OpenVINOYOLOModel로 추론합니다. (내보내기에만 ultralytics가 필요합니다.)
+
+사용 예:
+    python export_yolo.py --weights best_v4.pt --imgsz 480 320
+"""
+import argparse
+import os
+
+from ultralytics import YOLO
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="best_v4.pt")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640], help="입력 크기 (h w 또는 정사각형 한 값)")
+    args = parser.parse_args()
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    model = YOLO(os.path.join(current_dir, args.weights))
+    imgsz = args.imgsz if len(args.imgsz) > 1 else args.imgsz[0]
+    output = model.export(format="openvino", imgsz=imgsz, half=False, dynamic=False)
+    print(f"OpenVINO IR exported to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+import numpy as np
+
+
+class BufferPool:
+    """참조 카운트로 재사용되는 프레임 버퍼 풀
+
+    캡처 스레드는 참조가 없는 버퍼에만 새 프레임을 기록하고,
+    소비자에게는 쓰기 불가능한 뷰(view)를 넘겨 복사 없이 프레임을 공유합니다.
+    모든 구독자가 release()하면 버퍼는 다시 캡처에 사용됩니다.
+    """
+    def __init__(self, shape, dtype=np.uint8, size=6):
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(size)]
+        self.refcounts = [0] * size
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """참조가 없는 버퍼를 하나 예약하고 인덱스를 반환합니다. 없으면 None."""
+        with self.lock:
+            for index, count in enumerate(self.refcounts):
+                if count == 0:
+                    self.refcounts[index] = 1
+                    return index
+        return None
+
+    def retain(self, index):
+        with self.lock:
+            self.refcounts[index] += 1
+
+    def release(self, index):
+        with self.lock:
+            if self.refcounts[index] <= 0:
+                raise RuntimeError(f"이미 해제된 버퍼입니다: {index}")
+            self.refcounts[index] -= 1
+
+    def view(self, index):
+        """버퍼의 읽기 전용 뷰를 반환합니다."""
+        view = self.buffers[index].view()
+        view.flags.writeable = False
+        return view
+
+    def in_use(self):
+        with self.lock:
+            return sum(1 for count in self.refcounts if count > 0)
+
+
+class FramePacket:
+    """프레임 ID와 캡처 시각이 붙은 프레임
+
+    풀 버퍼를 가리키는 패킷은 next_frame()으로 받은 뒤 사용이 끝나면
+    반드시 release()해야 버퍼가 재사용됩니다. image는 읽기 전용이므로
+    오버레이를 그리려면 필요한 영역만 복사해서 사용합니다.
+    """
+    __slots__ = ("frame_id", "timestamp", "image", "pool", "index")
+
+    def __init__(self, frame_id, timestamp, image, pool=None, index=None):
+        self.frame_id = frame_id  # 단조 증가하는 프레임 번호
+        self.timestamp = timestamp  # 캡처 시각 (time.perf_counter 기준)
+        self.image = image
+        self.pool = pool
+        self.index = index
+
+    def retain(self):
+        if self.pool is not None:
+            self.pool.retain(self.index)
+
+    def release(self):
+        if self.pool is not None:
+            self.pool.release(self.index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameChannel:
+    """최신 프레임 하나만 보관하는 버전 관리 프레임 채널
+
+    소비자는 next_frame(after_id)로 마지막으로 처리한 프레임 이후의 새 프레임이
+    도착할 때까지 잠들어 있으므로, 같은 프레임을 두 번 추론하거나
+    프레임이 없을 때 busy-spin 하지 않습니다.
+    publish/close는 이벤트 루프 스레드에서 호출해야 합니다.
+    """
+    def __init__(self):
+        self.latest = None  # 가장 최근 FramePacket
+        self.frame_id = 0
+        self.closed = False
+        self._new_frame = asyncio.Event()
+
+    def publish(self, image, timestamp=None, pool=None, index=None):
+        """새 프레임을 게시하고 대기 중인 소비자를 깨웁니다.
+
+        pool/index가 주어지면 호출자가 가진 버퍼 참조 하나를 채널이 넘겨받아
+        다음 프레임이 게시될 때 해제합니다.
+        """
+        if self.closed:
+            if pool is not None:
+                pool.release(index)
+            return None
+        self.frame_id += 1
+        packet = FramePacket(self.frame_id, timestamp if timestamp is not None else time.perf_counter(),
+                             image, pool, index)
+        previous, self.latest = self.latest, packet
+        if previous is not None:
+            previous.release()
+
+        # 현재 대기자를 깨우고 다음 프레임용 이벤트로 교체
+        self._new_frame.set()
+        self._new_frame = asyncio.Event()
+        return packet
+
+    async def next_frame(self, after_id=0):
+        """after_id 이후의 프레임을 기다려 반환합니다. 채널이 닫히면 None을 반환합니다.
+
+        반환된 패킷은 호출자가 참조를 하나 가지므로 사용 후 release()해야 합니다.
+        """
+        while not self.closed:
+            packet = self.latest
+            if packet is not None and packet.frame_id > after_id:
+                packet.retain()
+                return packet
+            await self._new_frame.wait()
+        return None
+
+    def close(self):
+        """채널을 닫고 대기 중인 모든 소비자를 깨웁니다."""
+        self.closed = True
+        if self.latest is not None:
+            self.latest.release()
+            self.latest = None
+        self._new_frame.set()
@@ -0,0 +1,167 @@
+import time
+
+import numpy as np
+
+from event_bus import TrackEvent
+from grasp import GRASP_END, GRASP_START, GraspEvent
+
+
+class Fact:
+    """만료 시각이 있는 사실 하나 (예: 최근 제품 감지, 잡고 있는 손)"""
+    __slots__ = ("key", "value", "frame_id", "timestamp", "expires")
+
+    def __init__(self, key, value, frame_id, timestamp, expires):
+        self.key = key
+        self.value = value
+        self.frame_id = frame_id
+        self.timestamp = timestamp  # 사실이 관측된 프레임의 캡처 시각 (time.perf_counter 기준)
+        self.expires = expires  # 이 시각 이후 무효 (None이면 remove()할 때까지 유지)
+
+
+class FactStore:
+    """종류별 사실 저장소
+
+    TTL이 지난 사실은 조회할 때 정리하므로 사실마다 타이머 태스크를 두지 않습니다.
+    시각은 모두 프레임 캡처 시각 기준이며, 같은 (종류, 키)로 다시 add()하면 덮어씁니다.
+    """
+    def __init__(self):
+        self.facts = {}  # 종류 -> {키: Fact}
+
+    def add(self, kind, key, value, frame_id, timestamp, ttl=None):
+        expires = None if ttl is None else timestamp + ttl
+        self.facts.setdefault(kind, {})[key] = Fact(key, value, frame_id, timestamp, expires)
+
+    def remove(self, kind, key):
+        self.facts.get(kind, {}).pop(key, None)
+
+    def active(self, kind, now):
+        """now 기준으로 만료되지 않은 사실 목록 (만료된 사실은 여기서 삭제)"""
+        facts = self.facts.get(kind)
+        if not facts:
+            return []
+        for key in [k for k, f in facts.items() if f.expires is not None and f.expires < now]:
+            del facts[key]
+        return list(facts.values())
+
+
+def overlap_ratio(hand_box, object_box, pad=0.25):
+    """물체 박스 중 (pad 비율만큼 넓힌) 손 박스와 겹치는 면적 비율"""
+    x1, y1, x2, y2 = hand_box
+    pad_x, pad_y = (x2 - x1) * pad, (y2 - y1) * pad
+    ix = min(x2 + pad_x, object_box[2]) - max(x1 - pad_x, object_box[0])
+    iy = min(y2 + pad_y, object_box[3]) - max(y1 - pad_y, object_box[1])
+    area = (object_box[2] - object_box[0]) * (object_box[3] - object_box[1])
+    return max(ix, 0) * max(iy, 0) / area if area > 0 else 0.0
+
+
+class CatchEvent:
+    """융합 결과: 손이 특정 제품을 잡음"""
+    __slots__ = ("class_name", "confidence", "hand_id", "track_id", "frame_id", "timestamp", "latency")
+
+    def __init__(self, class_name, confidence, hand_id, track_id, frame_id, timestamp, latency):
+        self.class_name = class_name
+        self.confidence = confidence
+        self.hand_id = hand_id
+        self.track_id = track_id
+        self.frame_id = frame_id
+        self.timestamp = timestamp  # 판정을 완성한 이벤트의 프레임 캡처 시각
+        self.latency = latency  # 캡처부터 판정까지 (초)
+
+    def __repr__(self):
+        return (f"CatchEvent({self.class_name}, hand={self.hand_id}, track={self.track_id}, "
+                f"frame={self.frame_id}, {self.latency * 1000:.0f}ms)")
+
+
+class CatchRule:
+    """"잡기와 window초 이내의 (classes 중 하나인) 제품 감지가 손 박스와 겹침" 규칙
+
+    두 방향 모두 판정합니다.
+      - GRASP_START가 오면 마지막으로 본 지 window초 이내인 감지 사실과 비교
+      - 감지(또는 키프레임에서 다시 본 트랙)가 오면 잡고 있는 손(GRASP_END 전까지 유지되는 사실)과 비교
+    같은 (손, 트랙) 쌍은 잡기가 끝날 때까지 한 번만 판정합니다.
+    """
+    def __init__(self, window=1.0, classes=None, min_overlap=0.1, pad=0.25, hand_max_age=0.3):
+        self.window = window
+        self.classes = None if classes is None else set(classes)
+        self.min_overlap = min_overlap
+        self.pad = pad
+        self.hand_max_age = hand_max_age  # 손 박스 갱신에 쓸 손 결과의 최대 시간 차이 (초)
+        self.fired = set()  # 이미 판정한 (hand_id, track_id)
+
+    def matches(self, hand_box, detection):
+        if self.classes is not None and detection.class_name not in self.classes:
+            return False
+        if hand_box is None or detection.box is None:  # 위치 정보가 없으면 시간 조건만 사용
+            return True
+        return overlap_ratio(hand_box, detection.box, self.pad) >= self.min_overlap
+
+    def hand_boxes(self, facts, results, frame_id, timestamp):
+        """잡고 있는 손별 박스. 손 스테이지 결과(ResultStore)가 있으면 감지 프레임에 가까운 박스로 갱신"""
+        boxes = {f.key: f.value for f in facts.active("grasp", timestamp)}
+        hand = results.nearest("hand", frame_id, self.hand_max_age, timestamp) if results is not None else None
+        if hand is not None and "ids" in hand.value:
+            for hand_id, box in zip(hand.value["ids"], hand.value["boxes"]):
+                if int(hand_id) in boxes:
+                    boxes[int(hand_id)] = box
+        return boxes
+
+    def evaluate(self, facts, results, event):
+        """event 도착 시 판정. [(hand_id, TrackEvent)] 반환"""
+        pairs = []
+        if isinstance(event, GraspEvent):
+            if event.kind == GRASP_END:
+                self.fired = {p for p in self.fired if p[0] != event.hand_id}
+                return pairs
+            for fact in facts.active("detection", event.timestamp):
+                if abs(fact.timestamp - event.timestamp) <= self.window and self.matches(event.box, fact.value):
+                    pairs.append((event.hand_id, fact.value))
+        elif isinstance(event, TrackEvent):
+            for hand_id, box in self.hand_boxes(facts, results, event.frame_id, event.timestamp).items():
+                if self.matches(box, event):
+                    pairs.append((hand_id, event))
+        pairs = [(h, d) for h, d in pairs if (h, d.track_id) not in self.fired]
+        self.fired.update((h, d.track_id) for h, d in pairs)
+        return pairs
+
+
+class FusionEngine:
+    """잡기 / 감지 이벤트를 시간 제한(TTL) 사실로 저장하고 이벤트가 도착할 때마다 규칙을 평가합니다.
+
+    EventBus 리스너로 publish 안에서 바로 실행되므로 별도 태스크나 폴링이 없으며,
+    판정은 CatchEvent로 다시 발행합니다. 캡처부터 판정까지의 지연을 모아 report()로 출력합니다.
+    """
+    def __init__(self, bus, results=None, window=1.0, classes=None):
+        self.bus = bus
+        self.results = results  # 손 스테이지가 올린 최신 손 박스 (ResultStore, 선택)
+        self.window = window
+        self.facts = FactStore()
+        self.rule = CatchRule(window, classes)
+        self.clock = 0.0  # 지금까지 본 가장 늦은 캡처 시각 (스테이지마다 도착 순서가 달라 최대값 사용)
+        self.latencies = []
+        bus.add_listener(self.on_event, GraspEvent, TrackEvent)  # TrackEvent는 첫 감지(DetectionEvent) 포함
+
+    def on_event(self, event):
+        self.clock = max(self.clock, event.timestamp)
+        self.facts.active("detection", self.clock - self.window)  # 창을 벗어난 감지 정리
+        if isinstance(event, GraspEvent):
+            if event.kind == GRASP_START:
+                self.facts.add("grasp", event.hand_id, event.box, event.frame_id, event.timestamp)
+            elif event.kind == GRASP_END:
+                self.facts.remove("grasp", event.hand_id)
+        else:  # 다시 본 트랙은 박스와 TTL을 마지막으로 본 시각 기준으로 갱신
+            self.facts.add("detection", event.track_id, event, event.frame_id, event.timestamp, self.window)
+
+        for hand_id, detection in self.rule.evaluate(self.facts, self.results, event):
+            latency = time.perf_counter() - event.timestamp
+            self.latencies.append(latency)
+            self.bus.publish(CatchEvent(detection.class_name, detection.confidence, hand_id,
+                                        detection.track_id, event.frame_id, event.timestamp, latency))
+
+    def report(self):
+        """캡처 -> 판정 지연 통계 출력"""
+        if not self.latencies:
+            print("[fusion] no catch decisions")
+            return
+        latencies = np.array(self.latencies) * 1000
+        print(f"[fusion] {len(latencies)} catch decisions, capture->decision "
+              f"mean={latencies.mean():.1f}ms p95={np.percentile(latencies, 95):.1f}ms max={latencies.max():.1f}ms")
@@ -0,0 +1,161 @@
+import os
+import time
+from collections import deque
+
+import config
+from tracker import motion_thumbnail, scene_motion
+
+
+class Recent:
+    """stage의 최근 within초 이내 결과 중 predicate(value)를 만족하는 것이 있는지 확인하는 조건"""
+    def __init__(self, stage, within, predicate=None, name=None):
+        self.stage = stage
+        self.within = within
+        self.predicate = predicate
+        self.name = name or f"{stage} within {within * 1000:.0f}ms"
+
+    def __call__(self, results, packet):
+        recent = results.recent(self.stage, self.within, packet.timestamp)
+        return any(self.predicate is None or self.predicate(r.value) for r in recent)
+
+
+class SceneMotion:
+    """최근 hold초 안에 장면이 threshold 이상 움직였는지 확인하는 조건 (걷는 중 판단)
+
+    조건을 확인할 때마다 작은 흑백 썸네일을 직전 썸네일과 비교합니다.
+    """
+    def __init__(self, threshold=0.04, hold=1.0, name="walking"):
+        self.threshold = threshold
+        self.hold = hold
+        self.name = name
+        self.thumbnail = None
+        self.last_motion_time = None
+
+    def __call__(self, results, packet):
+        thumbnail = motion_thumbnail(packet.image[::8, ::8], (48, 27))  # 간격을 두고 읽어 루프 부담 최소화
+        if scene_motion(self.thumbnail, thumbnail) > self.threshold:
+            self.last_motion_time = packet.timestamp
+        self.thumbnail = thumbnail
+        return self.last_motion_time is not None and packet.timestamp - self.last_motion_time <= self.hold
+
+
+class StagePolicy:
+    """스테이지 실행 정책
+
+    when의 조건이 모두 참이면 활성 상태로 max_rate(Hz, None이면 제한 없음)까지 실행하고,
+    아니면 idle_rate(Hz, 0이면 실행 안 함)로 실행합니다.
+    cpu_budget(코어 비율, 예: 0.5)을 넘게 워커를 사용 중이면 건너뜁니다.
+    """
+    def __init__(self, stage, when=(), max_rate=None, idle_rate=0.0, cpu_budget=None):
+        self.stage = stage
+        self.when = list(when)
+        self.max_rate = max_rate
+        self.idle_rate = idle_rate
+        self.cpu_budget = cpu_budget
+
+
+class GateStats:
+    """스테이지별 게이트 판단 통계"""
+    def __init__(self):
+        self.allowed = 0
+        self.skipped = {}  # 건너뛴 이유 -> 횟수
+        self.last_run = None  # 마지막으로 허용한 프레임의 캡처 시각
+        self.busy_samples = deque()  # (시각, 누적 busy_time) - CPU 예산 계산용
+
+    @property
+    def total_skipped(self):
+        return sum(self.skipped.values())
+
+
+class GatingEngine:
+    """스테이지별 정책에 따라 프레임마다 추론 실행 여부를 결정합니다.
+
+    각 스테이지 루프는 추론 전에 allow(stage, packet)을 호출하고 False이면 프레임을 건너뜁니다.
+    조건은 ResultStore에 올라온 다른 스테이지의 최근 결과로 판단하며 (예: 최근 500ms 안에 손이 보였을 때만
+    YOLO 실행), 정책이 없는 스테이지는 항상 실행합니다. report()는 스테이지별 워커 사용률과
+    건너뛰어 절약한 추정 CPU를 출력합니다.
+    """
+    def __init__(self, executor, results, policies=(), window=2.0):
+        self.executor = executor
+        self.results = results
+        self.policies = {policy.stage: policy for policy in policies}
+        self.window = window  # CPU 예산을 계산하는 구간 (초)
+        self.stats = {stage: GateStats() for stage in executor.stats}
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    def allow(self, stage, packet):
+        policy = self.policies.get(stage)
+        stats = self.stats[stage]
+        reason = self._check(policy, stats, packet) if policy is not None else None
+        if reason is not None:
+            stats.skipped[reason] = stats.skipped.get(reason, 0) + 1
+            return False
+        stats.allowed += 1
+        stats.last_run = packet.timestamp
+        return True
+
+    def _check(self, policy, stats, packet):
+        """건너뛸 이유를 반환합니다 (실행하면 None)."""
+        failed = next((c.name for c in policy.when if not c(self.results, packet)), None)
+        rate = policy.max_rate if failed is None else policy.idle_rate
+        if not rate and failed is not None:
+            return failed
+        if rate and stats.last_run is not None and packet.timestamp - stats.last_run < 1.0 / rate:
+            return failed or "rate limit"
+
+        if policy.cpu_budget is not None:
+            now = time.perf_counter()
+            samples = stats.busy_samples
+            samples.append((now, self.executor.stats[policy.stage].busy_time))
+            while now - samples[0][0] > self.window:
+                samples.popleft()
+            elapsed = now - samples[0][0]
+            if elapsed > 0 and (samples[-1][1] - samples[0][1]) / elapsed > policy.cpu_budget:
+                return "cpu budget"
+        return None
+
+    def report(self):
+        """스테이지별 실행/건너뜀 횟수, 워커 사용률, 절약한 추정 CPU와 프로세스 CPU 사용률을 출력합니다."""
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        for stage, stats in self.stats.items():
+            stage_stats = self.executor.stats[stage]
+            avg_call = stage_stats.busy_time / stage_stats.calls if stage_stats.calls else 0.0
+            busy = stage_stats.busy_time / wall * 100 if wall else 0.0
+            saved = stats.total_skipped * avg_call / wall * 100 if wall else 0.0
+            reasons = ", ".join(f"{reason}={count}" for reason, count in stats.skipped.items()) or "-"
+            print(f"[gating] {stage}: ran={stats.allowed} skipped={stats.total_skipped} ({reasons}) "
+                  f"busy={busy:.0f}% saved~{saved:.0f}% of a core")
+        cores = os.cpu_count() or 1
+        print(f"[gating] process CPU: {cpu / wall * 100 if wall else 0.0:.0f}% of a core "
+              f"({cpu / wall / cores * 100 if wall else 0.0:.0f}% of {cores} cores)")
+
+
+def hand_present(value):
+    return len(value["boxes"]) > 0
+
+
+def hand_grasping(value):
+    return bool(value["grasping"].any())
+
+
+def default_policies():
+    """config 설정으로 기본 정책을 만듭니다.
+
+    - yolo : 최근 config.YOLO_HAND_WINDOW초 안에 손이 보였을 때만 실행
+             (config.YOLO_GATE="grasp"이면 손이 물체를 잡고 있을 때만)
+    - depth: 걷는 중(장면 움직임)에는 매 프레임, 정지 시에는 config.DEPTH_IDLE_RATE Hz
+    - 각 스테이지에 config.STAGE_CPU_BUDGET 예산 적용
+    """
+    budgets = config.STAGE_CPU_BUDGET
+    if config.YOLO_GATE == "grasp":
+        yolo_condition = Recent("hand", config.YOLO_HAND_WINDOW, hand_grasping, name="no grasp")
+    else:
+        yolo_condition = Recent("hand", config.YOLO_HAND_WINDOW, hand_present, name="no hand")
+    return [
+        StagePolicy("yolo", when=[yolo_condition], cpu_budget=budgets.get("yolo")),
+        StagePolicy("depth", when=[SceneMotion()], idle_rate=config.DEPTH_IDLE_RATE,
+                    cpu_budget=budgets.get("depth")),
+        StagePolicy("hand", cpu_budget=budgets.get("hand")),
+    ]
@@ -0,0 +1,88 @@
+import numpy as np
+
+# MediaPipe 손 랜드마크 인덱스 (mp.solutions.hands.HandLandmark와 같은 값)
+WRIST = 0
+THUMB_TIP = 4
+INDEX_FINGER_TIP = 8
+MIDDLE_FINGER_TIP = 12
+RING_FINGER_TIP = 16
+PINKY_MCP = 17
+PINKY_TIP = 20
+FINGERTIPS = (THUMB_TIP, INDEX_FINGER_TIP, MIDDLE_FINGER_TIP, RING_FINGER_TIP, PINKY_TIP)
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """랜드마크 목록(NormalizedLandmarkList)을 프레임당 한 번 (손 수, 21, 3) float32 배열로 변환합니다."""
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in multi_hand_landmarks],
+                    dtype=np.float32)
+
+
+def sample_depth(depth_map, landmarks, points=(WRIST,) + FINGERTIPS):
+    """손별로 points 랜드마크 위치의 깊이 값 중앙값 (N,)
+
+    depth_map은 normalize_depth()의 [0, 1] 맵(MiDaS: 값이 클수록 가까움)이며,
+    정규화 좌표를 쓰므로 깊이 맵 해상도와 카메라 해상도가 달라도 됩니다.
+    """
+    height, width = depth_map.shape[:2]
+    xy = landmarks[:, points, :2]
+    cols = np.clip((xy[..., 0] * width).astype(np.intp), 0, width - 1)
+    rows = np.clip((xy[..., 1] * height).astype(np.intp), 0, height - 1)
+    return np.median(depth_map[rows, cols], axis=1)
+
+
+class GestureRules:
+    """랜드마크 두 점 사이 거리(정규화 x, y) 규칙 모음
+
+    규칙은 (이름, 점 a, 점 b, 임계값, below)로 등록하며 below=True이면 거리 < 임계값,
+    False이면 거리 >= 임계값일 때 참입니다. evaluate()는 모든 손 x 모든 규칙을 배열 연산 한 번으로
+    계산하므로 규칙을 추가해도 파이썬 반복이 늘지 않습니다.
+    """
+    def __init__(self):
+        self.names = []
+        self.index = {}  # 이름 -> 열 번호
+        self.points_a = np.zeros(0, dtype=np.intp)
+        self.points_b = np.zeros(0, dtype=np.intp)
+        self.thresholds = np.zeros(0, dtype=np.float32)
+        self.below = np.zeros(0, dtype=bool)
+
+    def add(self, name, a, b, threshold, below=True):
+        if name in self.index:  # 같은 이름이면 임계값 등을 갱신
+            i = self.index[name]
+            self.points_a[i], self.points_b[i] = a, b
+            self.thresholds[i], self.below[i] = threshold, below
+            return self
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.points_a = np.append(self.points_a, a)
+        self.points_b = np.append(self.points_b, b)
+        self.thresholds = np.append(self.thresholds, np.float32(threshold))
+        self.below = np.append(self.below, below)
+        return self
+
+    def distances(self, landmarks):
+        """(손 수, 규칙 수) 거리 행렬"""
+        diff = landmarks[:, self.points_a, :2] - landmarks[:, self.points_b, :2]
+        return np.sqrt((diff * diff).sum(axis=-1))
+
+    def evaluate(self, landmarks):
+        """(손 수, 규칙 수) bool 행렬. 열 순서는 self.names"""
+        distances = self.distances(landmarks)
+        return np.where(self.below, distances < self.thresholds, distances >= self.thresholds)
+
+    def column(self, matrix, name):
+        return matrix[:, self.index[name]]
+
+
+def default_rules():
+    """기본 제스처 규칙 (임계값은 HAND 프로토타입 기준)
+
+    - pinky_fold        : 새끼손가락 TIP이 MCP에 가까움 (기존 catch 판정)
+    - thumb_middle_pinch: 엄지 끝과 중지 끝이 가까움 (hand3.5)
+    - hand_size         : 손목-중지 끝 길이가 충분함 (가까운 손만 사용, hand2.5/3.5)
+    """
+    return (GestureRules()
+            .add("pinky_fold", PINKY_TIP, PINKY_MCP, 0.05)
+            .add("thumb_middle_pinch", THUMB_TIP, MIDDLE_FINGER_TIP, 0.15)
+            .add("hand_size", WRIST, MIDDLE_FINGER_TIP, 0.3, below=False))
@@ -0,0 +1,113 @@
+import numpy as np
+
+from tracker import box_iou, greedy_match
+
+GRASP_START = "GRASP_START"
+GRASP_END = "GRASP_END"
+
+
+class RollingWindow:
+    """고정 크기 링 버퍼와 이동 합 (push마다 O(1)로 평균 갱신)"""
+    def __init__(self, size, item_shape=()):
+        self.values = np.zeros((size,) + tuple(item_shape), dtype=np.float32)
+        self.total = np.zeros(item_shape, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    def push(self, value):
+        if self.count == len(self.values):
+            self.total -= self.values[self.head]  # 버퍼에서 밀려나는 값
+        else:
+            self.count += 1
+        self.values[self.head] = value
+        self.total += self.values[self.head]
+        self.head = (self.head + 1) % len(self.values)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else self.total
+
+
+class GraspEvent:
+    """잡기 상태 변화 이벤트"""
+    __slots__ = ("kind", "hand_id", "frame_id", "timestamp", "box")
+
+    def __init__(self, kind, hand_id, frame_id, timestamp, box=None):
+        self.kind = kind  # GRASP_START / GRASP_END
+        self.hand_id = hand_id
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.box = box  # 이벤트 시점의 손 박스 (xyxy, 전체 프레임 픽셀 좌표)
+
+    def __repr__(self):
+        return f"GraspEvent({self.kind}, hand={self.hand_id}, frame={self.frame_id})"
+
+
+class HandState:
+    """추적 중인 손 하나의 최근 잡기 판정 기록"""
+    def __init__(self, hand_id, window):
+        self.hand_id = hand_id
+        self.votes = RollingWindow(window)  # 프레임별 잡기 판정 (0/1)
+        self.box = None
+        self.last_seen = None
+        self.grasping = False
+
+
+class GraspEngine:
+    """손별 최근 window 프레임의 잡기 판정 비율로 GRASP_START / GRASP_END를 내는 상태 엔진
+
+    한 프레임의 임계값 판정은 손가락이 물체 뒤로 가려질 때 깜빡이므로, 판정 비율이 start_ratio 이상이면
+    시작, end_ratio 이하로 떨어지거나 손이 lost_time초 이상 보이지 않으면 종료합니다 (히스테리시스).
+    손은 프레임 간 박스 IoU로 매칭해 hand_id를 유지합니다.
+    """
+    def __init__(self, window=8, start_ratio=0.6, end_ratio=0.25, min_frames=3, lost_time=0.5, match_iou=0.1):
+        self.window = window
+        self.start_ratio = start_ratio
+        self.end_ratio = end_ratio
+        self.min_frames = min_frames  # 시작 판정에 필요한 최소 관측 프레임 수
+        self.lost_time = lost_time
+        self.match_iou = match_iou
+        self.hands = []
+        self.next_id = 1
+        self.ids = np.zeros(0, dtype=np.int32)  # 마지막 update() 입력 순서의 손별 hand_id
+
+    def update(self, frame_id, timestamp, boxes, votes):
+        """한 프레임의 손 박스 (N, 4)와 잡기 판정 (N,)을 반영합니다.
+
+        (입력 순서의 손별 안정된 잡기 상태 (N,), 이벤트 목록)을 반환합니다.
+        """
+        events = []
+        known = np.array([h.box for h in self.hands], dtype=np.float32).reshape(-1, 4)
+        matches, _, new = greedy_match(box_iou(known, boxes), self.match_iou)
+        assigned = {c: self.hands[r] for r, c in matches}
+        for c in new:
+            assigned[c] = HandState(self.next_id, self.window)
+            self.hands.append(assigned[c])
+            self.next_id += 1
+
+        grasping = np.zeros(len(boxes), dtype=bool)
+        self.ids = np.zeros(len(boxes), dtype=np.int32)
+        for c, hand in assigned.items():
+            self.ids[c] = hand.hand_id
+            hand.box = boxes[c]
+            hand.last_seen = timestamp
+            hand.votes.push(float(votes[c]))
+            ratio = float(hand.votes.mean)
+            if not hand.grasping and hand.votes.count >= self.min_frames and ratio >= self.start_ratio:
+                hand.grasping = True
+                events.append(GraspEvent(GRASP_START, hand.hand_id, frame_id, timestamp, hand.box))
+            elif hand.grasping and ratio <= self.end_ratio:
+                hand.grasping = False
+                events.append(GraspEvent(GRASP_END, hand.hand_id, frame_id, timestamp, hand.box))
+            grasping[c] = hand.grasping
+
+        # 오래 보이지 않은 손은 제거 (잡고 있었다면 종료 이벤트)
+        for hand in [h for h in self.hands if timestamp - h.last_seen > self.lost_time]:
+            if hand.grasping:
+                events.append(GraspEvent(GRASP_END, hand.hand_id, frame_id, timestamp, hand.box))
+            self.hands.remove(hand)
+        return grasping, events
+
+    @property
+    def any_grasping(self):
+        return any(h.grasping for h in self.hands)
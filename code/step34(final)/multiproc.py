@@ -0,0 +1,206 @@
+import asyncio
+import multiprocessing as mp
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from executor import InferenceExecutor
+
+
+class SharedFrameBus:
+    """multiprocessing.shared_memory 위의 프레임 링 슬롯
+
+    오케스트레이터가 프레임을 슬롯에 한 번 기록하면, 모든 스테이지 프로세스가
+    복사 없이 같은 슬롯을 읽습니다. 슬롯 재사용 시점은 오케스트레이터가 관리합니다.
+    """
+    def __init__(self, shape, slots, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = name is None
+        size = int(np.prod(self.shape)) * slots
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, slot, image):
+        """프레임을 슬롯에 기록합니다. 해상도가 다르면 슬롯 크기로 맞춥니다."""
+        if image.shape == self.shape:
+            np.copyto(self.frames[slot], image)
+        else:
+            cv2.resize(image, (self.shape[1], self.shape[0]), dst=self.frames[slot])
+
+    def frame(self, slot):
+        """슬롯의 읽기 전용 뷰를 반환합니다."""
+        view = self.frames[slot].view()
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        del self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _stage_worker(stage, factory, args, bus_name, shape, slots, tasks, results):
+    """스테이지 프로세스: 모델을 생성하고 (frame_id, slot, roi) 작업을 처리합니다."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C는 오케스트레이터가 처리
+    try:
+        model = factory(*args)
+    except Exception as e:
+        results.put(("error", stage, None, f"모델 생성 실패: {e!r}", 0.0))
+        return
+    info = model.describe() if hasattr(model, "describe") else {}
+    results.put(("ready", stage, None, info, 0.0))
+
+    bus = SharedFrameBus(shape, slots, name=bus_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:  # 종료 신호
+                break
+            frame_id, slot, roi = task
+            image = bus.frame(slot)
+            if roi is not None:
+                x1, y1, x2, y2 = roi
+                image = image[y1:y2, x1:x2]
+
+            start = time.perf_counter()
+            try:
+                kind, payload = "result", model.infer(image)
+            except Exception as e:
+                kind, payload = "error", f"{stage} 추론 실패: {e!r}"
+            results.put((kind, stage, frame_id, payload, time.perf_counter() - start))
+    finally:
+        bus.close()
+
+
+class ProcessInferenceExecutor(InferenceExecutor):
+    """스테이지별 모델을 각자의 프로세스에서 실행하는 실행 계층
+
+    InferenceExecutor와 같은 register/start/infer/run 인터페이스를 제공합니다.
+    프레임은 SharedFrameBus 슬롯으로 전달되고, 결과는 하나의 결과 큐로 돌아옵니다.
+    run()으로 넘기는 후처리 함수는 기존처럼 오케스트레이터의 스테이지 스레드에서 실행됩니다.
+    """
+    def __init__(self, frame_shape, stages=("depth", "hand", "yolo"), max_pending=1):
+        super().__init__(stages, max_pending)
+        self.ctx = mp.get_context("spawn")
+        # 진행 중인 프레임은 최대 sum(limits)개이므로 슬롯이 부족할 일이 없음
+        self.bus = SharedFrameBus(frame_shape, slots=sum(self.limits.values()) + 1)
+        self.slot_users = [0] * self.bus.slots  # 슬롯별 진행 중인 작업 수
+        self.frame_slots = {}  # frame_id -> slot
+        self.results = self.ctx.Queue()
+        self.tasks = {}
+        self.processes = {}
+        self.futures = {}  # (stage, frame_id) -> asyncio.Future
+        self.loop = None
+        self.reader = None
+
+    def register(self, stage, factory, *args):
+        """스테이지 프로세스를 시작하고 그 안에서 factory(*args)로 모델을 생성합니다."""
+        tasks = self.ctx.Queue()
+        process = self.ctx.Process(
+            target=_stage_worker,
+            args=(stage, factory, args, self.bus.name, self.bus.shape, self.bus.slots, tasks, self.results),
+            name=f"infer-{stage}",
+            daemon=True,
+        )
+        process.start()
+        self.tasks[stage] = tasks
+        self.processes[stage] = process
+
+    def start(self):
+        """모든 스테이지 프로세스의 모델 생성이 끝날 때까지 기다립니다."""
+        waiting = set(self.processes)
+        while waiting:
+            kind, stage, _, payload, _ = self.results.get()
+            if kind == "error":
+                raise RuntimeError(payload)
+            self.info[stage] = payload
+            waiting.discard(stage)
+            print(f"[multiproc] {stage} worker ready (pid={self.processes[stage].pid})")
+
+    async def infer(self, stage, packet, roi=None):
+        """패킷 프레임을 공유 메모리 슬롯에 올리고 스테이지 프로세스의 결과를 기다립니다."""
+        if self.reader is None:
+            self.loop = asyncio.get_running_loop()
+            self.reader = threading.Thread(target=self._read_results, name="multiproc-results", daemon=True)
+            self.reader.start()
+
+        stats = self.stats[stage]
+        wait_start = time.perf_counter()
+        await self.slots[stage].acquire()
+        stats.wait_time += time.perf_counter() - wait_start
+        key = (stage, packet.frame_id)
+        try:
+            slot = self._acquire_slot(packet)
+            future = self.futures[key] = self.loop.create_future()
+            self.tasks[stage].put((packet.frame_id, slot, roi))
+        except BaseException:
+            if self.futures.pop(key, None) is not None:  # 슬롯을 잡은 뒤 실패
+                self._release_slot(packet.frame_id)
+            self.slots[stage].release()
+            raise
+        # 스테이지 슬롯과 공유 메모리 슬롯은 워커의 결과(또는 오류)를 받을 때 _resolve()에서 해제
+        # (기다리던 태스크가 취소되어도 워커는 아직 그 프레임을 읽는 중일 수 있음)
+        return await future
+
+    def _acquire_slot(self, packet):
+        """프레임당 한 번만 공유 메모리에 기록하고 슬롯을 공유합니다."""
+        slot = self.frame_slots.get(packet.frame_id)
+        if slot is None:
+            slot = self.slot_users.index(0)
+            self.bus.write(slot, packet.image)
+            self.frame_slots[packet.frame_id] = slot
+        self.slot_users[slot] += 1
+        return slot
+
+    def _release_slot(self, frame_id):
+        slot = self.frame_slots[frame_id]
+        self.slot_users[slot] -= 1
+        if self.slot_users[slot] == 0:
+            del self.frame_slots[frame_id]
+
+    def _read_results(self):
+        """결과 큐를 읽어 이벤트 루프의 Future를 완료합니다 (전용 스레드)."""
+        while True:
+            message = self.results.get()
+            if message is None:
+                break
+            self.loop.call_soon_threadsafe(self._resolve, message)
+
+    def _resolve(self, message):
+        kind, stage, frame_id, payload, busy_time = message
+        stats = self.stats[stage]
+        stats.busy_time += busy_time
+        stats.calls += 1
+        self._release_slot(frame_id)  # 워커가 프레임을 다 읽었으므로 재사용 가능
+        self.slots[stage].release()
+        future = self.futures.pop((stage, frame_id), None)
+        if future is None or future.done():  # 취소된 요청
+            return
+        if kind == "result":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def shutdown(self):
+        """스테이지 프로세스를 종료하고 공유 메모리를 해제합니다."""
+        for tasks in self.tasks.values():
+            tasks.put(None)
+        for process in self.processes.values():
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        if self.reader is not None:
+            self.results.put(None)
+            self.reader.join(timeout=1.0)
+        self.bus.close()
+        super().shutdown()
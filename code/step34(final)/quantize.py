@@ -0,0 +1,185 @@
+"""MiDaS / YOLO OpenVINO IR의 INT8 양자화 (NNCF Post-Training Quantization)
+
+녹화 영상(--video) 또는 로컬 이미지 폴더(--images, 예: cider 데이터셋)에서 프레임을 모아
+앞부분은 보정(calibration)용, 나머지는 검증용으로 사용합니다.
+MiDaS 보정 입력은 실행 시 전처리 그래프와 같게 (--frame-size 카메라 프레임 -> RGB -> 모델 크기) 만듭니다.
+  - MiDaS: model/midas/MiDaS_small.xml -> model/midas/MiDaS_small_int8.xml
+  - YOLO : best_v4_openvino_model/    -> best_v4_int8_openvino_model/ (export_yolo.py로 먼저 내보내기)
+
+검증 단계에서는 같은 검증 프레임을 FP32 / INT8로 추론하여 다음 일치율을 출력합니다.
+  - depth: 섹션 통계로 내린 회피 판단(None / Avoid to Left / Avoid to Right / 동률)
+  - yolo : 프레임별 최고 점수 제품 클래스 (탐지 없음 포함)
+하나라도 --min-agreement 미만이면 종료 코드 1을 반환합니다.
+양자화한 모델은 CHORONG_MODEL_PRECISION=INT8 로 실행하면 사용됩니다.
+
+사용 예:
+    python quantize.py --video session1.mp4 session2.mp4 --calib 300 --min-agreement 0.95
+    python quantize.py --images dataset/images --models yolo
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+
+import cv2
+import nncf
+import numpy as np
+import openvino as ov
+
+from test_depth import (DepthProcessor, build_depth_preprocessing, compile_model, compute_section_stats,
+                        count_hot_sections, download_midas_model, get_core, normalize_depth)
+from test_detect import OpenVINOYOLOModel, current_dir
+
+DEPTH_THRESHOLD = 0.8  # DepthWithTTS.analyze와 같은 값
+DETECT_ROI = (320, 480)  # YOLODetector의 중앙 영역 (w, h)
+
+
+def load_frames(videos, image_dir, max_frames, stride):
+    """영상은 stride 간격으로, 이미지 폴더는 정렬 순서대로 최대 max_frames장을 읽습니다."""
+    frames = []
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        index = 0
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % stride == 0:
+                frames.append(frame)
+            index += 1
+        cap.release()
+    if image_dir:
+        paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(image_dir, "**", f"*.{ext}"),
+                                                                                recursive=True))
+        for path in paths[:max(max_frames - len(frames), 0)]:
+            image = cv2.imread(path)
+            if image is not None:
+                frames.append(image)
+    if not frames:
+        raise ValueError("보정용 프레임을 읽지 못했습니다. --video 또는 --images를 확인하세요.")
+    return frames
+
+
+def center_crop(frame, size=DETECT_ROI):
+    """탐지기와 같은 중앙 영역 (프레임이 작으면 그대로 사용)"""
+    h, w = frame.shape[:2]
+    crop_w, crop_h = min(size[0], w), min(size[1], h)
+    x, y = (w - crop_w) // 2, (h - crop_h) // 2
+    return frame[y:y + crop_h, x:x + crop_w]
+
+
+def depth_decision(result):
+    """회피 판단을 무작위 동률 처리 없이 비교 가능한 값으로 변환합니다."""
+    counts = count_hot_sections(compute_section_stats(normalize_depth(result)), DEPTH_THRESHOLD)
+    if counts is None:
+        return None
+    left_count, right_count = counts
+    if left_count == right_count:
+        return "tie"
+    return "Avoid to Left" if right_count > left_count else "Avoid to Right"
+
+
+def top_class(detections):
+    _, scores, classes = detections
+    return int(classes[scores.argmax()]) if len(scores) else None
+
+
+def agreement(reference, candidate):
+    return sum(a == b for a, b in zip(reference, candidate)) / max(len(reference), 1)
+
+
+def runtime_depth_input(frame, frame_size, input_shape):
+    """실행 시 전처리 그래프(build_depth_preprocessing)가 원본 IR에 넘기는 것과 같은 입력 텐서
+
+    카메라 크기(frame_size)의 u8 BGR 프레임 -> RGB -> 모델 크기로 선형 리사이즈 -> f32 NCHW
+    """
+    if (frame.shape[1], frame.shape[0]) != frame_size:  # DepthProcessor.preprocess와 같은 크기 맞춤
+        frame = cv2.resize(frame, frame_size)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    resized = cv2.resize(rgb, (input_shape[3], input_shape[2]), interpolation=cv2.INTER_LINEAR)
+    return np.ascontiguousarray(resized.transpose(2, 0, 1)[np.newaxis], dtype=np.float32)
+
+
+def quantize_midas(calib, valid, subset_size, frame_size):
+    core = get_core()
+    fp32_path = download_midas_model()
+    int8_path = fp32_path.with_name(fp32_path.stem + "_int8.xml")
+
+    # 원본 IR(f32 NCHW 입력)을 양자화하고, 실행 시 setup_depth_model이 INT8 IR 위에 PrePostProcessor 전처리를
+    # 다시 붙입니다. 따라서 보정 데이터도 그 전처리 그래프의 출력(RGB, 카메라 프레임에서 리사이즈)과 같게 만듭니다.
+    fp32_model = core.read_model(fp32_path)
+    input_shape = fp32_model.input(0).shape
+    dataset = nncf.Dataset(calib, lambda frame: runtime_depth_input(frame, frame_size, input_shape))
+    int8_model = nncf.quantize(fp32_model, dataset, subset_size=min(subset_size, len(calib)))
+    ov.save_model(int8_model, int8_path)
+    print(f"MiDaS INT8 model saved to: {int8_path}")
+
+    # 검증은 실행 경로 그대로 (전처리 그래프 포함 모델에 카메라 크기 u8 BGR 프레임 전달)
+    decisions = {}
+    for name, path in (("fp32", fp32_path), ("int8", int8_path)):
+        compiled = compile_model(build_depth_preprocessing(core.read_model(path), *frame_size))
+        processor = DepthProcessor(compiled, compiled.input(0), compiled.output(0), frame_size)
+        decisions[name] = [depth_decision(processor.process_frame(frame)) for frame in valid]
+    return agreement(decisions["fp32"], decisions["int8"])
+
+
+def quantize_yolo(calib, valid, subset_size, model_dir):
+    fp32_dir = os.path.join(current_dir, model_dir)
+    int8_dir = fp32_dir.replace("_openvino_model", "_int8_openvino_model")
+    reference = OpenVINOYOLOModel(model_dir)
+
+    xml_name = next(f for f in os.listdir(fp32_dir) if f.endswith(".xml"))
+    model = get_core().read_model(os.path.join(fp32_dir, xml_name))
+    dataset = nncf.Dataset([center_crop(frame) for frame in calib], lambda crop: reference.preprocess(crop)[0])
+    # 탐지 헤드의 Sigmoid는 양자화 시 점수 분포가 크게 바뀌므로 FP32로 둡니다.
+    int8_model = nncf.quantize(model, dataset, subset_size=min(subset_size, len(calib)),
+                               preset=nncf.QuantizationPreset.MIXED,
+                               ignored_scope=nncf.IgnoredScope(types=["Sigmoid"]))
+    os.makedirs(int8_dir, exist_ok=True)
+    ov.save_model(int8_model, os.path.join(int8_dir, xml_name))
+    shutil.copy(os.path.join(fp32_dir, "metadata.yaml"), int8_dir)
+    print(f"YOLO INT8 model saved to: {int8_dir}")
+
+    candidate = OpenVINOYOLOModel(os.path.basename(int8_dir))
+    crops = [center_crop(frame) for frame in valid]
+    return agreement([top_class(reference.infer(c)) for c in crops],
+                     [top_class(candidate.infer(c)) for c in crops])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", nargs="*", default=[], help="녹화 세션 영상 경로 (여러 개 가능)")
+    parser.add_argument("--images", help="로컬 이미지 폴더 (하위 폴더 포함)")
+    parser.add_argument("--models", nargs="+", choices=("depth", "yolo"), default=["depth", "yolo"])
+    parser.add_argument("--calib", type=int, default=300, help="보정용 프레임 수")
+    parser.add_argument("--valid", type=int, default=200, help="검증용 프레임 수")
+    parser.add_argument("--stride", type=int, default=5, help="영상에서 몇 프레임마다 하나씩 사용할지")
+    parser.add_argument("--yolo-dir", default="best_v4_openvino_model")
+    parser.add_argument("--frame-size", default="1280x720", help="실행 시 카메라 프레임 크기 (WxH, 뎁스 전처리 그래프 기준)")
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="FP32 대비 최소 판단 일치율")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.images, args.calib + args.valid, args.stride)
+    calib, valid = frames[:args.calib], frames[args.calib:] or frames
+    if not frames[args.calib:]:
+        print("검증용 프레임이 부족하여 보정 프레임으로 검증합니다.")
+    print(f"calibration frames={len(calib)} validation frames={len(valid)}")
+
+    results = {}
+    if "depth" in args.models:
+        frame_size = tuple(int(v) for v in args.frame_size.lower().split("x"))
+        results["depth decision"] = quantize_midas(calib, valid, args.calib, frame_size)
+    if "yolo" in args.models:
+        results["yolo top-1 class"] = quantize_yolo(calib, valid, args.calib, args.yolo_dir)
+
+    passed = True
+    for name, rate in results.items():
+        ok = rate >= args.min_agreement
+        passed &= ok
+        print(f"{name:18s} agreement={rate:.3f} ({'OK' if ok else 'BELOW'} {args.min_agreement:.2f})")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from collections import deque
+
+
+class StageResult:
+    """스테이지 결과 하나 (어느 프레임에서 나온 결과인지 함께 보관)"""
+    __slots__ = ("frame_id", "timestamp", "value")
+
+    def __init__(self, frame_id, timestamp, value):
+        self.frame_id = frame_id  # 결과를 만든 프레임 번호
+        self.timestamp = timestamp  # 해당 프레임의 캡처 시각 (time.perf_counter 기준)
+        self.value = value
+
+
+class ResultStore:
+    """스테이지 간 결과 공유 저장소
+
+    한 스테이지가 put()으로 프레임별 결과를 올리면 다른 스테이지가 latest() 또는
+    같은 프레임에 가장 가까운 결과를 nearest()로 가져갑니다 (예: 손 박스 -> 탐지기 ROI).
+    스테이지마다 최근 history개만 보관하며, 이벤트 루프 스레드에서만 사용합니다.
+    """
+    def __init__(self, history=16):
+        self.history = history
+        self.results = {}
+
+    def put(self, stage, frame_id, timestamp, value):
+        results = self.results.get(stage)
+        if results is None:
+            results = self.results[stage] = deque(maxlen=self.history)
+        results.append(StageResult(frame_id, timestamp, value))
+
+    def latest(self, stage, max_age=None, now=None):
+        """가장 최근 결과. max_age(초)가 주어지면 now 기준으로 그보다 오래된 결과는 None"""
+        results = self.results.get(stage)
+        if not results:
+            return None
+        result = results[-1]
+        if max_age is not None and now is not None and now - result.timestamp > max_age:
+            return None
+        return result
+
+    def recent(self, stage, max_age, now):
+        """now 기준 max_age초 이내의 결과 목록 (오래된 것부터)"""
+        return [r for r in self.results.get(stage, ()) if now - r.timestamp <= max_age]
+
+    def nearest(self, stage, frame_id, max_age=None, now=None):
+        """frame_id에 가장 가까운 프레임의 결과 (max_age 조건은 latest와 같음)"""
+        results = self.results.get(stage)
+        if not results:
+            return None
+        result = min(results, key=lambda r: abs(r.frame_id - frame_id))
+        if max_age is not None and now is not None and abs(now - result.timestamp) > max_age:
+            return None
+        return result
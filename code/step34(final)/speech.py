@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+# 우선순위 클래스 (작을수록 먼저 말함)
+OBSTACLE = 0  # 회피 안내
+PRODUCT = 1  # 제품 안내 ("[class name] catch")
+INFO = 2  # 그 외 안내
+PRIORITY_NAMES = {OBSTACLE: "obstacle", PRODUCT: "product", INFO: "info"}
+
+# 클래스별 기본 유효 시간 (초). 큐에서 이 시간을 넘긴 메시지는 늦게 말하지 않고 버림
+DEFAULT_DEADLINES = {OBSTACLE: 1.0, PRODUCT: 3.0, INFO: 10.0}
+
+
+def classify(text):
+    """문장으로 우선순위 클래스를 정합니다 (priority를 지정하지 않은 speak 호출용)."""
+    if "Avoid" in text:
+        return OBSTACLE
+    if text.endswith("catch"):
+        return PRODUCT
+    return INFO
+
+
+class SpeechMessage:
+    """말할 메시지 하나"""
+    __slots__ = ("text", "priority", "key", "enqueued", "deadline")
+
+    def __init__(self, text, priority, key, enqueued, deadline):
+        self.text = text
+        self.priority = priority
+        self.key = key  # 같은 key의 메시지는 하나로 합침 (기본: 문장)
+        self.enqueued = enqueued  # 처음 큐에 들어온 시각 (time.perf_counter 기준)
+        self.deadline = deadline  # 이 시각이 지나면 말하지 않음
+
+
+class SchedulerStats:
+    __slots__ = ("spoken", "expired", "coalesced", "preempted", "delays")
+
+    def __init__(self):
+        self.spoken = 0
+        self.expired = 0  # 유효 시간이 지나 버린 수
+        self.coalesced = 0  # 이미 대기 중(또는 재생 중)인 메시지와 합친 수
+        self.preempted = 0  # 재생 도중 더 높은 우선순위에 끊긴 수
+        self.delays = []  # 큐 대기 시간 (초)
+
+
+class SpeechScheduler:
+    """우선순위 / 유효 시간 / 중복 합치기 / 끼어들기를 지원하는 TTS 메시지 스케줄러
+
+    우선순위 클래스마다 key -> 메시지 OrderedDict를 두어 같은 key는 O(1)로 합치고
+    (대기 순서는 유지, 문장과 유효 시간은 최신 값으로 갱신), 꺼낼 때는 가장 높은 클래스의 가장 오래된 메시지를 씁니다.
+    재생 중인 메시지보다 높은 클래스가 들어오면 interrupt()를 호출해 재생을 끊습니다.
+    중단 표시는 get()이 다음 메시지를 고를 때 reset()으로만 지우므로, 메시지를 꺼낸 뒤 재생이 시작되기 전에
+    끼어들기가 와도 그 메시지는 재생되지 않습니다.
+    put()은 어느 스레드에서나, get() / done()은 재생 스레드 하나에서 호출합니다.
+    """
+    def __init__(self, deadlines=None, interrupt=None, reset=None):
+        self.deadlines = dict(DEFAULT_DEADLINES if deadlines is None else deadlines)
+        self.interrupt = interrupt  # 재생 중단 콜백 (예: AudioSink.stop). 없으면 끼어들기 없이 다음 차례에 말함
+        self.reset = reset  # 새 메시지 재생 전 중단 표시를 지우는 콜백 (예: AudioSink.reset)
+        self.queues = {priority: OrderedDict() for priority in sorted(self.deadlines)}
+        self.condition = threading.Condition()
+        self.current = None  # 재생 중인 메시지
+        self.current_preempted = False
+        self.closed = False
+        self.stats = {priority: SchedulerStats() for priority in self.queues}
+
+    def put(self, text, priority=None, key=None, deadline=None, now=None):
+        """메시지를 추가합니다. deadline은 지금부터의 유효 시간(초), 없으면 클래스 기본값"""
+        priority = classify(text) if priority is None else priority
+        key = text if key is None else key
+        now = time.perf_counter() if now is None else now
+        expires = now + (self.deadlines[priority] if deadline is None else deadline)
+        with self.condition:
+            current = self.current
+            if current is not None and current.key == key and current.text == text and not self.current_preempted:
+                self.stats[priority].coalesced += 1  # 지금 말하는 중인 문장
+                return
+            queue = self.queues[priority]
+            message = queue.get(key)
+            if message is not None:
+                message.text, message.deadline = text, max(message.deadline, expires)
+                self.stats[priority].coalesced += 1
+                return
+            queue[key] = SpeechMessage(text, priority, key, now, expires)
+            if current is not None and priority < current.priority and not self.current_preempted:
+                self.current_preempted = True
+                self.stats[current.priority].preempted += 1
+                if self.interrupt is not None:
+                    self.interrupt()
+            self.condition.notify()
+
+    def _pop(self, now):
+        for priority, queue in self.queues.items():
+            while queue:
+                _, message = queue.popitem(last=False)
+                if message.deadline < now:
+                    self.stats[priority].expired += 1
+                    continue
+                return message
+        return None
+
+    def get(self, timeout=None):
+        """다음에 말할 메시지 (닫혔거나 timeout이 지나면 None). 유효 시간이 지난 메시지는 여기서 버림"""
+        end = None if timeout is None else time.perf_counter() + timeout
+        with self.condition:
+            while not self.closed:
+                now = time.perf_counter()
+                message = self._pop(now)
+                if message is not None:
+                    if self.reset is not None:
+                        self.reset()
+                    self.current, self.current_preempted = message, False
+                    self.stats[message.priority].delays.append(now - message.enqueued)
+                    return message
+                if end is not None and now >= end:
+                    return None
+                self.condition.wait(None if end is None else end - now)
+            return None
+
+    def done(self, message):
+        """재생이 끝났거나 끊겼음을 알립니다. 끝까지 말했으면 True"""
+        with self.condition:
+            finished = not (self.current is message and self.current_preempted)
+            if finished:
+                self.stats[message.priority].spoken += 1
+            self.current, self.current_preempted = None, False
+            return finished
+
+    def preempted(self, message):
+        """재생 중인 message가 더 높은 우선순위에 의해 끊겨야 하는지"""
+        with self.condition:
+            return self.current is message and self.current_preempted
+
+    def pending(self):
+        with self.condition:
+            return sum(len(queue) for queue in self.queues.values())
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def report(self, prefix="[tts]"):
+        for priority, stats in self.stats.items():
+            line = (f"{prefix} {PRIORITY_NAMES.get(priority, priority):8s} spoken={stats.spoken} expired={stats.expired} "
+                    f"coalesced={stats.coalesced} preempted={stats.preempted}")
+            if stats.delays:
+                delays = sorted(d * 1000 for d in stats.delays)
+                line += (f" queue-delay mean={sum(delays) / len(delays):.1f}ms "
+                         f"p95={delays[int(len(delays) * 0.95)]:.1f}ms max={delays[-1]:.1f}ms")
+            print(line)
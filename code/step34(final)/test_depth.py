@@ -1,12 +1,15 @@
 import cv2
 import numpy as np
 import openvino as ov
+from openvino.preprocess import ColorFormat, PrePostProcessor, ResizeAlgorithm
 from pathlib import Path
 import asyncio
-import matplotlib.cm
+import functools
 import random
+import time
 import sys
 import os
+import config
 
 # 유틸리티 경로 설정
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,20 +18,73 @@ utils_dir = os.path.join(parent_dir, "utils")
 sys.path.append(utils_dir)
 import notebook_utils as utils
 
+# OpenCV 내장 컬러맵 (matplotlib 없이 LUT 생성 가능)
+CV2_COLORMAPS = {
+    "viridis": cv2.COLORMAP_VIRIDIS,
+    "plasma": cv2.COLORMAP_PLASMA,
+    "inferno": cv2.COLORMAP_INFERNO,
+    "magma": cv2.COLORMAP_MAGMA,
+    "cividis": cv2.COLORMAP_CIVIDIS,
+    "turbo": cv2.COLORMAP_TURBO,
+    "jet": cv2.COLORMAP_JET,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def colormap_lut(colormap="viridis"):
+    """컬러맵별 256단계 uint8 LUT를 만들어 캐시합니다 (기존 matplotlib 출력과 같은 RGB 순서)."""
+    if colormap in CV2_COLORMAPS:
+        gray = np.arange(256, dtype=np.uint8).reshape(256, 1)
+        bgr = cv2.applyColorMap(gray, CV2_COLORMAPS[colormap])
+        return np.ascontiguousarray(bgr[:, :, ::-1])
+
+    # OpenCV에 없는 컬러맵만 matplotlib으로 한 번 생성
+    import matplotlib
+    colors = matplotlib.colormaps[colormap](np.linspace(0.0, 1.0, 256))[:, :3]
+    return np.ascontiguousarray((colors * 255).astype(np.uint8).reshape(256, 1, 3))
+
+
+def normalize_depth(result):
+    """모델 출력(1xHxW)을 [0, 1] float32 깊이 맵으로 정규화합니다 (min/max는 한 번만 계산)."""
+    depth = result.squeeze(0).astype(np.float32, copy=False)
+    low, high, _, _ = cv2.minMaxLoc(depth)
+    scale = 1.0 / (high - low) if high > low else 0.0
+    return (depth - np.float32(low)) * np.float32(scale)
+
+
+def depth_map_to_image(depth_map, colormap="viridis"):
+    """정규화된 깊이 맵을 캐시된 LUT로 컬러 이미지로 변환합니다."""
+    depth_u8 = cv2.convertScaleAbs(depth_map, alpha=255.0)
+    return cv2.applyColorMap(depth_u8, colormap_lut(colormap))
+
 
 class DepthProcessor:
-    def __init__(self, compiled_model, input_key, output_key):
+    def __init__(self, compiled_model, input_key, output_key, frame_size=None):
         self.compiled_model = compiled_model
         self.input_key = input_key
         self.output_key = output_key
+        self.frame_size = frame_size  # (width, height): 전처리가 모델에 포함된 경우의 입력 프레임 크기
+
+    def preprocess(self, frame):
+        """프레임을 모델 입력 텐서로 변환합니다."""
+        if self.frame_size is not None:
+            # 리사이즈/레이아웃/색 변환은 컴파일된 모델 안에서 수행 (u8 NHWC BGR 그대로 전달)
+            if (frame.shape[1], frame.shape[0]) != self.frame_size:
+                frame = cv2.resize(frame, self.frame_size)
+            return frame[np.newaxis]
+        resized_frame = cv2.resize(frame, (self.input_key.shape[2], self.input_key.shape[3]))
+        return np.expand_dims(np.transpose(resized_frame, (2, 0, 1)), 0)
 
     def process_frame(self, frame):
         """주어진 프레임에서 뎁스 결과를 생성합니다."""
-        resized_frame = cv2.resize(frame, (self.input_key.shape[2], self.input_key.shape[3]))
-        input_image = np.expand_dims(np.transpose(resized_frame, (2, 0, 1)), 0)
+        input_image = self.preprocess(frame)
         result = self.compiled_model([input_image])[self.output_key]
         return result
 
+    def infer(self, frame):
+        """실행 계층(InferenceExecutor)에서 호출하는 추론 진입점"""
+        return self.process_frame(frame)
+
     def visualize_result(self, result):
         """뎁스 결과를 시각화합니다."""
         result_frame = self.convert_result_to_image(result)
@@ -39,43 +95,67 @@ class DepthProcessor:
         """뎁스 데이터를 정규화합니다."""
         return (data - data.min()) / (data.max() - data.min())
 
-    def convert_result_to_image(self, result, colormap="viridis"):
+    @staticmethod
+    def convert_result_to_image(result, colormap="viridis"):
         """뎁스 결과를 컬러맵으로 변환합니다."""
-        cmap = matplotlib.colormaps[colormap]
-        result = result.squeeze(0)
-        result = self.normalize_minmax(result)
-        result = cmap(result)[:, :, :3] * 255
-        result = result.astype(np.uint8)
-        return result
+        return depth_map_to_image(normalize_depth(result), colormap)
 
 
-def process_depth_sections(depth_map, num_rows=5, num_cols=5, threshold=0.85):
-    """깊이 맵을 섹션으로 나누고, 각 섹션의 평균 뎁스를 계산하여 방향을 결정합니다."""
+class SectionStats:
+    """그리드 섹션별 뎁스 통계 (방향 결정과 오버레이가 같은 결과를 공유)"""
+    def __init__(self, means, mins, maxs, percentiles=None):
+        self.means = means  # (num_rows, num_cols) 섹션 평균
+        self.mins = mins  # (num_rows, num_cols) 섹션 최솟값
+        self.maxs = maxs  # (num_rows, num_cols) 섹션 최댓값
+        self.percentiles = percentiles or {}  # 백분위 q -> (num_rows, num_cols)
+
+    @property
+    def grid_shape(self):
+        return self.means.shape
+
+
+def compute_section_stats(depth_map, num_rows=5, num_cols=5, percentiles=()):
+    """깊이 맵을 num_rows x num_cols 섹션으로 나누어 모든 섹션 통계를 한 번에 계산합니다.
+
+    모델 출력 해상도 그대로 reshape 후 축 방향 집계로 계산하며,
+    나누어 떨어지지 않는 가장자리 픽셀은 기존 방식과 같이 제외합니다.
+    """
     h, w = depth_map.shape
     section_height = h // num_rows
     section_width = w // num_cols
-    
-    left_count = 0
-    right_count = 0
-    threshold_hit = False  # 쓰레스홀드를 만족하는 섹션이 있는지 확인
+    cells = depth_map[:section_height * num_rows, :section_width * num_cols].reshape(
+        num_rows, section_height, num_cols, section_width
+    )
+    means = cells.mean(axis=(1, 3))
+    mins = cells.min(axis=(1, 3))
+    maxs = cells.max(axis=(1, 3))
+
+    values = {}
+    if percentiles:
+        flat = cells.transpose(0, 2, 1, 3).reshape(num_rows, num_cols, -1)
+        for q, value in zip(percentiles, np.percentile(flat, percentiles, axis=2)):
+            values[q] = value
+    return SectionStats(means, mins, maxs, values)
+
+
+def count_hot_sections(stats, threshold=0.85):
+    """threshold 이상인 섹션 수를 (왼쪽, 오른쪽)으로 반환합니다. 없으면 None."""
+    hot = stats.means >= threshold
+    if not hot.any():
+        return None
 
-    for row in range(num_rows):
-        for col in range(num_cols):
-            y1, y2 = row * section_height, (row + 1) * section_height
-            x1, x2 = col * section_width, (col + 1) * section_width
-            section = depth_map[y1:y2, x1:x2]
-            mean_depth = section.mean()
-            
-            if mean_depth >= threshold:
-                threshold_hit = True
-                if col < num_cols // 2:
-                    left_count += 1
-                else:
-                    right_count += 1
-
-    if not threshold_hit:  # Threshold를 만족하는 섹션이 없으면 None 반환
+    num_cols = hot.shape[1]
+    return int(hot[:, :num_cols // 2].sum()), int(hot[:, num_cols // 2:].sum())
+
+
+def decide_direction(stats, threshold=0.85):
+    """섹션 평균이 threshold 이상인 섹션이 많은 쪽의 반대 방향으로 회피 방향을 결정합니다."""
+    counts = count_hot_sections(stats, threshold)
+    if counts is None:  # Threshold를 만족하는 섹션이 없으면 None 반환
         return None
 
+    left_count, right_count = counts
+
     if left_count > right_count:
         return "Avoid to Right"
     elif right_count > left_count:
@@ -84,10 +164,22 @@ def process_depth_sections(depth_map, num_rows=5, num_cols=5, threshold=0.85):
         return random.choice(["Avoid to Right", "Avoid to Left"])
 
 
-def display_depth_sections(image, depth_map, num_rows=5, num_cols=5, output_width=1280, output_height=720):
-    """깊이 맵 섹션을 표시하고 평균 뎁스를 시각화합니다."""
+def process_depth_sections(depth_map, num_rows=5, num_cols=5, threshold=0.85):
+    """깊이 맵을 섹션으로 나누고, 각 섹션의 평균 뎁스를 계산하여 방향을 결정합니다."""
+    stats = compute_section_stats(depth_map, num_rows, num_cols)
+    return decide_direction(stats, threshold)
+
+
+def display_depth_sections(image, depth_map, num_rows=5, num_cols=5, output_width=1280, output_height=720,
+                           stats=None):
+    """깊이 맵 섹션을 표시하고 평균 뎁스를 시각화합니다.
+
+    stats가 주어지면 이미 계산된 섹션 통계를 그대로 사용합니다 (깊이 맵 리사이즈 없음).
+    """
+    if stats is None:
+        stats = compute_section_stats(depth_map, num_rows, num_cols)
+    num_rows, num_cols = stats.grid_shape
     image = cv2.resize(image, (output_width, output_height))
-    depth_map = cv2.resize(depth_map, (output_width, output_height))
 
     section_height = output_height // num_rows
     section_width = output_width // num_cols
@@ -96,12 +188,10 @@ def display_depth_sections(image, depth_map, num_rows=5, num_cols=5, output_widt
         for col in range(num_cols):
             y1, y2 = row * section_height, (row + 1) * section_height
             x1, x2 = col * section_width, (col + 1) * section_width
-            section = depth_map[y1:y2, x1:x2]
-            mean_depth = section.mean()
 
             cv2.putText(
                 image,
-                f"{mean_depth:.2f}",
+                f"{stats.means[row, col]:.2f}",
                 (x1 + 10, y1 + 30),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
@@ -114,6 +204,84 @@ def display_depth_sections(image, depth_map, num_rows=5, num_cols=5, output_widt
     return image
 
 
+class RequestStats:
+    """추론 요청(infer request)별 처리량/지연시간 카운터"""
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0  # start_async ~ 완료 콜백까지 (대기 포함)
+        self.device_ms = 0.0  # OpenVINO가 보고한 순수 추론 시간
+        self.max_ms = 0.0
+
+    def add(self, total_ms, device_ms):
+        self.count += 1
+        self.total_ms += total_ms
+        self.device_ms += device_ms
+        self.max_ms = max(self.max_ms, total_ms)
+
+    def summary(self):
+        if not self.count:
+            return "count=0"
+        return (f"count={self.count} avg={self.total_ms / self.count:.1f}ms "
+                f"device={self.device_ms / self.count:.1f}ms max={self.max_ms:.1f}ms")
+
+
+class PipelinedDepthProcessor(DepthProcessor):
+    """OpenVINO AsyncInferQueue로 여러 추론 요청을 겹쳐 실행하는 뎁스 프로세서
+
+    프레임 N이 추론되는 동안 프레임 N+1의 전처리가 진행됩니다.
+    결과 순서는 호출자(DepthWithTTS.run)가 제출 순서대로 기다려 보장합니다.
+    """
+    def __init__(self, compiled_model, input_key, output_key, jobs=2, frame_size=None):
+        super().__init__(compiled_model, input_key, output_key, frame_size)
+        self.jobs = jobs
+        self.infer_queue = ov.AsyncInferQueue(compiled_model, jobs)
+        self.infer_queue.set_callback(self._on_complete)
+        self.request_stats = [RequestStats() for _ in range(jobs)]
+        self.started = None  # 첫 요청 시작 시각 (처리량 계산용)
+        self.completed = 0
+
+    def infer_async(self, frame, on_done):
+        """전처리 후 비동기 추론을 시작합니다.
+
+        완료되면 OpenVINO 콜백 스레드에서 on_done(result, error)가 호출됩니다.
+        """
+        input_image = self.preprocess(frame)
+        if self.started is None:
+            self.started = time.perf_counter()
+        job_id = self.infer_queue.get_idle_request_id()  # start_async가 사용할 요청 (제출은 한 스레드에서만)
+        self.infer_queue.start_async({0: input_image}, (job_id, time.perf_counter(), on_done))
+
+    def _on_complete(self, request, userdata):
+        job_id, submitted, on_done = userdata
+        self.request_stats[job_id].add((time.perf_counter() - submitted) * 1000, request.latency)
+        try:
+            result = request.get_tensor(self.output_key).data.copy()  # 요청 버퍼는 재사용되므로 복사
+        except Exception as e:
+            on_done(None, e)
+            return
+        self.completed += 1
+        on_done(result, None)
+
+    def report(self):
+        """요청별 카운터와 전체 처리량을 출력합니다."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        throughput = self.completed / elapsed if elapsed else 0.0
+        print(f"[depth] AsyncInferQueue jobs={self.jobs} throughput={throughput:.1f} fps")
+        for job_id, stats in enumerate(self.request_stats):
+            print(f"[depth]   request {job_id}: {stats.summary()}")
+
+
+def midas_model_path():
+    """설정된 정밀도(config.MODEL_PRECISION)의 MiDaS IR 경로. INT8 모델이 없으면 FP32를 사용합니다."""
+    model_path = download_midas_model()
+    if config.MODEL_PRECISION == "INT8":
+        int8_path = model_path.with_name(model_path.stem + "_int8.xml")
+        if int8_path.exists():
+            return int8_path
+        print(f"INT8 MiDaS model not found ({int8_path}). Run quantize.py first; using FP32.")
+    return model_path
+
+
 def download_midas_model():
     """MiDaS 모델 다운로드 및 설정"""
     model_folder = Path("model/midas")
@@ -136,23 +304,27 @@ def download_midas_model():
 async def unified_depth(shared_data):
     """비동기적으로 뎁스 모델을 실행하고 섹션 분석 및 시각화를 수행합니다."""
     depth_processor = setup_depth_model()
-    
+    channel = shared_data['channel']
+    last_frame_id = 0
+
     while shared_data['running']:
-        frame = shared_data.get('frame')
-        if frame is None:
-            await asyncio.sleep(0)  # 이벤트 루프 양보
-            continue
+        # 새 프레임이 도착할 때까지 대기
+        packet = await channel.next_frame(last_frame_id)
+        if packet is None:
+            break
+        last_frame_id = packet.frame_id
 
         try:
-            depth_result = depth_processor.process_frame(frame)
-            depth_map = (depth_result.squeeze(0) - depth_result.min()) / (depth_result.max() - depth_result.min())
-            depth_frame = depth_processor.visualize_result(depth_result)
+            with packet:
+                depth_result = depth_processor.process_frame(packet.image)
+            depth_map = normalize_depth(depth_result)
+            depth_frame = depth_map_to_image(depth_map)
 
             decision = process_depth_sections(depth_map, num_rows=5, num_cols=5, threshold=0.85)
 
             if decision:  # Threshold 충족 시에만 실행
                 depth_frame_with_sections = display_depth_sections(
-                    depth_frame.copy(), depth_map, num_rows=5, num_cols=5, output_width=1280, output_height=720
+                    depth_frame, depth_map, num_rows=5, num_cols=5, output_width=1280, output_height=720
                 )
 
                 cv2.putText(
@@ -180,11 +352,73 @@ async def unified_depth(shared_data):
         await asyncio.sleep(0)
 
 
-def setup_depth_model():
+def build_depth_preprocessing(model, frame_width, frame_height):
+    """카메라 프레임(u8 NHWC BGR)을 그대로 받도록 MiDaS 모델에 전처리 그래프를 추가합니다.
+
+    리사이즈, NHWC -> NCHW 변환, BGR -> RGB 변환, f32 변환이 모델 안에서 수행됩니다.
+    MiDaS IR에는 평균/스케일 정규화가 이미 포함되어 있어 별도의 mean/scale은 추가하지 않습니다.
+    """
+    ppp = PrePostProcessor(model)
+    ppp.input().tensor() \
+        .set_element_type(ov.Type.u8) \
+        .set_shape([1, frame_height, frame_width, 3]) \
+        .set_layout(ov.Layout("NHWC")) \
+        .set_color_format(ColorFormat.BGR)
+    ppp.input().model().set_layout(ov.Layout("NCHW"))
+    ppp.input().preprocess() \
+        .convert_element_type(ov.Type.f32) \
+        .convert_color(ColorFormat.RGB) \
+        .resize(ResizeAlgorithm.RESIZE_LINEAR)
+    return ppp.build()
+
+
+@functools.lru_cache(maxsize=None)
+def get_core():
+    """프로세스 전체에서 공유하는 OpenVINO Core (컴파일 캐시 설정 포함)"""
     core = ov.Core()
-    model_path = download_midas_model()
+    if config.OV_CACHE_DIR:
+        Path(config.OV_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        core.set_property({"CACHE_DIR": config.OV_CACHE_DIR})  # 두 번째 실행부터 컴파일 생략
+    return core
+
+
+def resolve_device(core, device):
+    """요청한 장치가 없으면 CPU로 대체합니다 (AUTO/MULTI 등 가상 장치는 그대로 사용)."""
+    base = device.split(":")[0].split(".")[0]
+    if base in ("AUTO", "MULTI", "HETERO", "BATCH"):
+        return device
+    if any(available.split(".")[0] == base for available in core.available_devices):
+        return device
+    print(f"OpenVINO device '{device}' is not available ({core.available_devices}). Falling back to CPU.")
+    return "CPU"
+
+
+def compile_model(model, device=None, hint=None):
+    """설정된 장치/성능 힌트로 모델을 컴파일하고 소요 시간을 출력합니다."""
+    core = get_core()
+    device = resolve_device(core, device or config.OV_DEVICE)
+    hint = hint or config.OV_PERFORMANCE_HINT
+    start = time.perf_counter()
+    compiled_model = core.compile_model(model=model, device_name=device, config={"PERFORMANCE_HINT": hint})
+    print(f"Compiled {model.get_friendly_name()} on {device} "
+          f"(hint={hint}, cache={'on' if config.OV_CACHE_DIR else 'off'}) in {time.perf_counter() - start:.2f}s")
+    return compiled_model
+
+
+def setup_depth_model(jobs=0, frame_size=None):
+    """MiDaS 모델을 컴파일합니다.
+
+    jobs > 0이면 AsyncInferQueue 기반 파이프라인을 사용하고,
+    frame_size=(width, height)가 주어지면 전처리를 모델 안에 포함시킵니다.
+    """
+    core = get_core()
+    model_path = midas_model_path()
     model = core.read_model(model_path)
-    compiled_model = core.compile_model(model=model, device_name="GPU")
+    if frame_size is not None:
+        model = build_depth_preprocessing(model, *frame_size)
+    compiled_model = compile_model(model)
     input_key = compiled_model.input(0)
     output_key = compiled_model.output(0)
-    return DepthProcessor(compiled_model, input_key, output_key)
+    if jobs > 0:
+        return PipelinedDepthProcessor(compiled_model, input_key, output_key, jobs=jobs, frame_size=frame_size)
+    return DepthProcessor(compiled_model, input_key, output_key, frame_size)
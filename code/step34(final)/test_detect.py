@@ -1,93 +1,347 @@
 import cv2
 import asyncio
-from ultralytics import YOLO
+import numpy as np
 import os
 import logging
-from datetime import datetime
+import config
+from event_bus import DetectionEvent, TrackEvent
+from tracker import ByteTracker, DetectionScheduler, motion_thumbnail, scene_motion
 
 # 로깅 수준 설정
 logging.getLogger("ultralytics").setLevel(logging.WARNING)
 
-class YOLODetector:
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class YOLOModel:
+    """YOLO 추론만 담당하는 모델 (ultralytics/PyTorch 경로, 실행 계층의 워커에서 생성/실행)"""
     def __init__(self, model_path='best_v4.pt'):
         # 모델 파일 경로 확인 및 로드
-        current_dir = os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(current_dir, model_path)
 
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"YOLO 모델 파일을 찾을 수 없습니다: {model_path}")
 
+        from ultralytics import YOLO  # PyTorch 경로를 쓸 때만 import
         self.model = YOLO(model_path)
-        self.last_detection_time = 0  # 마지막 출력 시간을 기록
-        self.detection_flag = False  # 감지 상태 플래그
-        self.flag_reset_time = 0  # 플래그 유지 종료 시간
-
-    async def manage_detection_flag(self):
-        """비동기로 감지 플래그를 관리합니다."""
-        # print("Starting manage_detection_flag...")  # 디버깅 출력
-        self.detection_flag = True
-        print("class detect flag - 5s")  # 플래그 활성화 출력
-        self.flag_reset_time = asyncio.get_event_loop().time() + 5  # 현재 시간 기준 5초 후 해제
-        await asyncio.sleep(5)  # 5초 유지
-        self.detection_flag = False
-        print("class flag end")  # 플래그 종료 출력
-
-    async def run_detection(self, shared_data):
+        self.names = self.model.names
+
+    def describe(self):
+        """오케스트레이터에 전달할 모델 정보"""
+        return {'names': self.names}
+
+    def infer(self, frame):
+        """(xyxy, conf, cls) numpy 배열을 반환합니다."""
+        boxes = self.model(frame, verbose=False)[0].boxes
+        return boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy()
+
+
+def letterbox(image, new_shape, color=(114, 114, 114)):
+    """비율을 유지하며 new_shape(h, w)에 맞추고 남는 부분을 채웁니다. (이미지, 배율, (pad_x, pad_y)) 반환"""
+    h, w = image.shape[:2]
+    ratio = min(new_shape[0] / h, new_shape[1] / w)
+    resized_w, resized_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (new_shape[1] - resized_w) / 2, (new_shape[0] - resized_h) / 2
+    if (resized_w, resized_h) != (w, h):
+        image = cv2.resize(image, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
+
+
+def non_max_suppression(boxes, scores, iou_threshold):
+    """numpy NMS. boxes는 (N, 4) xyxy, 점수 내림차순으로 남길 인덱스를 반환합니다."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OpenVINOYOLOModel:
+    """OpenVINO IR로 내보낸 YOLO 모델 (PyTorch 없이 numpy로 후처리)
+
+    export_yolo.py로 만든 <이름>_openvino_model 폴더(xml/bin/metadata.yaml)를 사용하며,
+    YOLOModel과 같은 (xyxy, conf, cls) 결과를 반환합니다.
+    """
+    def __init__(self, model_dir='best_v4_openvino_model', conf_threshold=0.25, iou_threshold=0.7):
+        from test_depth import get_core, compile_model  # 뎁스 모델과 같은 OpenVINO Core 사용
+        import yaml
+
+        model_dir = os.path.join(current_dir, model_dir)
+        xml_files = [f for f in os.listdir(model_dir) if f.endswith(".xml")] if os.path.isdir(model_dir) else []
+        if not xml_files:
+            raise FileNotFoundError(f"YOLO OpenVINO 모델을 찾을 수 없습니다: {model_dir}")
+
+        with open(os.path.join(model_dir, "metadata.yaml"), encoding="utf-8") as f:
+            metadata = yaml.safe_load(f)
+        self.names = {int(k): v for k, v in metadata["names"].items()}
+
+        model = get_core().read_model(os.path.join(model_dir, xml_files[0]))
+        self.compiled_model = compile_model(model)
+        self.input_shape = tuple(self.compiled_model.input(0).shape)[2:]  # (h, w)
+        self.output_key = self.compiled_model.output(0)
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+
+    def describe(self):
+        """오케스트레이터에 전달할 모델 정보"""
+        return {'names': self.names}
+
+    def preprocess(self, frame):
+        image, ratio, pad = letterbox(frame, self.input_shape)
+        blob = cv2.dnn.blobFromImage(image, scalefactor=1 / 255.0, swapRB=True)  # BGR->RGB, NCHW f32
+        return blob, ratio, pad
+
+    def postprocess(self, output, ratio, pad):
+        """(1, 4 + 클래스 수, 후보 수) 출력을 NMS 후 원본 좌표 (xyxy, conf, cls)로 변환합니다."""
+        predictions = output[0].T  # (후보 수, 4 + 클래스 수)
+        class_scores = predictions[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        mask = scores >= self.conf_threshold
+        predictions, classes, scores = predictions[mask], classes[mask], scores[mask]
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+        # 클래스별 NMS (클래스마다 좌표를 이동시켜 한 번에 처리)
+        offsets = classes[:, None].astype(np.float32) * 4096.0
+        keep = non_max_suppression(boxes + offsets, scores, self.iou_threshold)
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+
+        boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+        boxes /= ratio
+        return boxes.astype(np.float32), scores.astype(np.float32), classes.astype(np.float32)
+
+    def infer(self, frame):
+        """(xyxy, conf, cls) numpy 배열을 반환합니다."""
+        blob, ratio, pad = self.preprocess(frame)
+        output = self.compiled_model([blob])[self.output_key]
+        boxes, scores, classes = self.postprocess(output, ratio, pad)
+        h, w = frame.shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+        return boxes, scores, classes
+
+
+def create_yolo_model(model_path='best_v4.pt', backend=None):
+    """설정된 백엔드로 YOLO 모델을 생성합니다.
+
+    backend: "openvino" / "ultralytics" / "auto" (내보낸 IR이 있으면 OpenVINO, 없으면 ultralytics)
+    """
+    backend = backend or config.YOLO_BACKEND
+    model_dir = os.path.splitext(model_path)[0] + "_openvino_model"
+    if config.MODEL_PRECISION == "INT8":
+        int8_dir = os.path.splitext(model_path)[0] + "_int8_openvino_model"  # quantize.py 출력
+        if os.path.isdir(os.path.join(current_dir, int8_dir)):
+            model_dir = int8_dir
+    if backend == "openvino" or (backend == "auto" and os.path.isdir(os.path.join(current_dir, model_dir))):
+        return OpenVINOYOLOModel(model_dir)
+    return YOLOModel(model_path)
+
+
+# 탐지 결과 한 건: 박스(xyxy), 신뢰도, 클래스 ID
+DETECTION_DTYPE = np.dtype([('xyxy', np.float32, (4,)), ('conf', np.float32), ('cls', np.int32)])
+
+
+def to_detections(boxes, scores, classes):
+    """모델 출력 (xyxy, conf, cls) 배열을 DETECTION_DTYPE 구조화 배열 하나로 변환합니다."""
+    detections = np.empty(len(scores), dtype=DETECTION_DTYPE)
+    detections['xyxy'] = np.asarray(boxes).reshape(-1, 4)
+    detections['conf'] = scores
+    detections['cls'] = classes
+    return detections
+
+
+def best_detection(detections):
+    """신뢰도가 가장 높은 탐지 (없으면 None)"""
+    return detections[detections['conf'].argmax()] if len(detections) else None
+
+
+def make_name_table(names):
+    """클래스 ID -> 이름 dict를 인덱싱용 배열로 변환합니다 (한 번만 생성)."""
+    table = np.empty(max(names, default=-1) + 1, dtype=object)
+    table[:] = [names.get(i, str(i)) for i in range(len(table))]
+    return table
+
+
+def draw_detections(image, detections, labels, color=(0, 255, 0)):
+    """박스는 polylines 한 번으로, 라벨은 미리 만든 문자열로 그립니다."""
+    corners = detections['xyxy'].astype(np.int32)
+    x1, y1, x2, y2 = corners.T
+    polygons = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                         np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1)
+    cv2.polylines(image, list(polygons), True, color, 2)
+    for label, x, y in zip(labels, x1.tolist(), (y1 - 10).tolist()):
+        cv2.putText(image, label, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+
+
+def center_roi(width, height, size=(320, 480)):
+    """프레임 중앙의 고정 크기 영역 (x1, y1, x2, y2)"""
+    x1, y1 = (width - size[0]) // 2, (height - size[1]) // 2
+    return x1, y1, x1 + size[0], y1 + size[1]
+
+
+def hand_roi(hand, width, height, pad=0.5, min_size=160):
+    """잡고 있는 손(없으면 가장 큰 손) 주변을 손 크기의 pad 비율만큼 넓힌 영역. 손이 없으면 None"""
+    boxes, grasping = hand["boxes"], hand["grasping"]
+    if not len(boxes):
+        return None
+    candidates = boxes[grasping] if grasping.any() else boxes
+    areas = (candidates[:, 2] - candidates[:, 0]) * (candidates[:, 3] - candidates[:, 1])
+    x1, y1, x2, y2 = candidates[areas.argmax()]
+
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    half_w = max((x2 - x1) * (1 + 2 * pad), min_size) / 2
+    half_h = max((y2 - y1) * (1 + 2 * pad), min_size) / 2
+    roi = (int(max(cx - half_w, 0)), int(max(cy - half_h, 0)),
+           int(min(cx + half_w, width)), int(min(cy + half_h, height)))
+    if roi[2] - roi[0] < 32 or roi[3] - roi[1] < 32:  # 손이 프레임 가장자리에 걸쳐 너무 작게 잘린 경우
+        return None
+    return roi
+
+
+class YOLODetector:
+    def __init__(self, conf_threshold=0.25, display=None, max_interval=None, roi_mode=None, bus=None):
+        self.names = {}  # 클래스 ID -> 이름 (실행 계층에 등록된 YOLOModel에서 가져옴)
+        self.name_table = make_name_table({})
+        self.conf_threshold = conf_threshold
+        self.display = config.DISPLAY if display is None else display  # 화면이 없으면 그리기 생략
+        # "hand": 손 주변 영역을 탐지 (손이 없으면 중앙), "center": 항상 중앙 320x480
+        self.roi_mode = config.DETECT_ROI if roi_mode is None else roi_mode
+        self.hand_max_age = 0.3  # ROI로 사용할 손 결과의 최대 시간 차이 (초)
+        # 탐지기는 키프레임에서만 실행하고 그 사이는 추적기로 박스/ID를 유지
+        self.tracker = ByteTracker()
+        self.scheduler = DetectionScheduler(
+            max_interval=config.DETECT_MAX_INTERVAL if max_interval is None else max_interval
+        )
+        self.keyframe_thumbnail = None  # 마지막 키프레임의 장면 썸네일 (움직임 비교용)
+        self.announced_ids = set()  # 이미 안내한 트랙 ID (같은 물체 재안내 방지)
+        self.last_timestamp = None
+        self.bus = bus  # 감지 이벤트를 발행할 EventBus (없으면 발행하지 않음)
+
+    def publish(self, event):
+        if self.bus is not None:
+            self.bus.publish(event)
+
+    def announce_new_tracks(self, tracks, frame_id, timestamp):
+        """처음 확정된 트랙만 DetectionEvent로 발행합니다 (같은 트랙 ID는 사라질 때까지 다시 발행하지 않음).
+
+        감지를 얼마나 오래 유효하게 볼지는 구독자(FusionEngine)가 TTL로 판단합니다.
+        새로 안내한 트랙 ID 집합을 반환합니다.
+        """
+        new_tracks = [t for t in tracks if t.track_id not in self.announced_ids]
+        self.announced_ids.intersection_update(t.track_id for t in self.tracker.tracks)
+        self.announced_ids.update(t.track_id for t in new_tracks)
+
+        for track in sorted(new_tracks, key=lambda t: -t.conf):
+            self.publish(DetectionEvent(track.cls, self.name_table[track.cls], track.conf, track.track_id,
+                                        frame_id, timestamp, track.box))
+        return {t.track_id for t in new_tracks}
+
+    def publish_sightings(self, tracks, new_ids, frame_id, timestamp):
+        """키프레임에서 탐지와 다시 매칭된 기존 트랙을 TrackEvent로 발행합니다.
+
+        FusionEngine은 이 이벤트로 감지 사실의 박스와 TTL을 마지막으로 본 시각 기준으로 갱신하므로,
+        오래 보이던 제품을 나중에 잡아도 판정됩니다.
+        """
+        for track in tracks:
+            if track.lost_time == 0.0 and track.track_id not in new_ids:
+                self.publish(TrackEvent(track.cls, self.name_table[track.cls], track.conf, track.track_id,
+                                        frame_id, timestamp, track.box))
+
+    def select_roi(self, results, packet):
+        """이번 프레임의 탐지 영역과 그 출처("hand" / "center")"""
+        height, width = packet.image.shape[:2]
+        if self.roi_mode == "hand" and results is not None:
+            hand = results.nearest("hand", packet.frame_id, max_age=self.hand_max_age, now=packet.timestamp)
+            roi = hand_roi(hand.value, width, height) if hand is not None else None
+            if roi is not None:
+                return roi, "hand"
+        return center_roi(width, height), "center"
+
+    async def run_detection(self, shared_data, executor):
         """비동기적으로 YOLO 모델을 사용해 객체 감지를 실행합니다."""
         print("Starting YOLO Detection...")
+        self.names = executor.info["yolo"]['names']
+        self.name_table = make_name_table(self.names)
+        channel = shared_data['channel']
+        results = shared_data.get('results')  # 손 스테이지가 올린 손 박스 (ResultStore)
+        gate = shared_data.get('gate')  # 손이 없으면 탐지를 건너뜀 (GatingEngine)
+        last_frame_id = 0
         while shared_data['running']:
-            frame = shared_data.get('frame')
-            if frame is None:
-                await asyncio.sleep(0)  # 프레임이 준비될 때까지 대기
+            # 새 프레임이 도착할 때까지 대기
+            packet = await channel.next_frame(last_frame_id)
+            if packet is None:
+                break
+            last_frame_id = packet.frame_id
+            if gate is not None and not gate.allow("yolo", packet):
+                packet.release()
                 continue
 
-            # 중앙에서 320x480 크기로 자르기
-            original_height, original_width = frame.shape[:2]
-            crop_x_start = (original_width - 320) // 2
-            crop_y_start = (original_height - 480) // 2
-            crop_x_end = crop_x_start + 320
-            crop_y_end = crop_y_start + 480
-            cropped_frame = frame[crop_y_start:crop_y_end, crop_x_start:crop_x_end]
-
-            # 모델 예측
-            results = self.model(cropped_frame, verbose=False)
-
-            # 현재 시간
-            current_time = asyncio.get_event_loop().time()
-
-            # YOLO의 바운딩 박스 및 확률 그대로 표시
-            for box, cls, score in zip(results[0].boxes.xyxy, results[0].boxes.cls, results[0].boxes.conf):
-                x1, y1, x2, y2 = map(int, box.tolist())
-                class_id = int(cls)  # 클래스 ID 가져오기
-                class_name = self.model.names[class_id]  # 클래스 이름 가져오기
-
-                # 초당 1회만 터미널 출력
-                if current_time - self.last_detection_time >= 1:
-                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    print(f"[{now}] Detected: {class_name} ({score:.2f})")
-                    self.last_detection_time = current_time
-
-                # 플래그 설정 (새로운 감지 시 비동기 관리 태스크 실행)
-                if not self.detection_flag:
-                    # print("Creating detection flag task...")  # 디버깅 출력
-                    asyncio.create_task(self.manage_detection_flag())
-
-                # YOLO 바운딩 박스 및 확률 표시
-                cv2.rectangle(cropped_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(
-                    cropped_frame, f"{class_name} ({score:.2f})", (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA
-                )
+            with packet:
+                frame = packet.image
+                dt = 0.0 if self.last_timestamp is None else packet.timestamp - self.last_timestamp
+                self.last_timestamp = packet.timestamp
+
+                # 손 주변(손이 없으면 중앙 320x480) 영역 자르기 (읽기 전용 뷰)
+                roi, roi_source = self.select_roi(results, packet)
+                crop_x_start, crop_y_start, crop_x_end, crop_y_end = roi
+                cropped_view = frame[crop_y_start:crop_y_end, crop_x_start:crop_x_end]
 
-            # 감지 상태 유지 중이면 표시
-            if self.detection_flag:
-                cv2.putText(
-                    cropped_frame, " ", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2, cv2.LINE_AA
+                # 장면 움직임과 추적 신뢰도로 이번 프레임에서 탐지기를 실행할지 결정
+                thumbnail = motion_thumbnail(cropped_view)
+                keyframe = self.scheduler.should_detect(
+                    scene_motion(self.keyframe_thumbnail, thumbnail),
+                    self.tracker.confidence(), self.tracker.max_speed()
                 )
+                if keyframe:
+                    # 모델 예측 (전용 워커에서 크롭 영역만 추론)
+                    detections = to_detections(*await executor.infer("yolo", packet, roi=roi))
+                    self.keyframe_thumbnail = thumbnail
+                # 바운딩 박스 오버레이용 복사본 (화면이 있을 때만)
+                output_frame = frame.copy() if self.display else None
+
+            if keyframe:
+                # 신뢰도 필터링은 배열 단위로, 매칭은 추적기에서 (고/저신뢰 2단계)
+                detections = detections[detections['conf'] >= self.conf_threshold]
+                # ROI가 프레임마다 바뀌므로 추적은 전체 프레임 좌표로 수행
+                detections['xyxy'] += np.array([crop_x_start, crop_y_start] * 2, dtype=np.float32)
+                tracks = self.tracker.update(detections, dt)
+            else:
+                tracks = self.tracker.predict(dt)
+            new_ids = self.announce_new_tracks(tracks, packet.frame_id, packet.timestamp)
+            if keyframe:
+                self.publish_sightings(tracks, new_ids, packet.frame_id, packet.timestamp)
+
+            if not self.display:
+                await asyncio.sleep(0)  # 이벤트 루프 양보
+                continue
+
+            # 추적 중인 박스, 트랙 ID 및 확률 표시 (한 번에 그리기)
+            if tracks:
+                boxes = to_detections(np.array([t.box for t in tracks]), [t.conf for t in tracks],
+                                      [t.cls for t in tracks])
+                labels = [f"{self.name_table[t.cls]} #{t.track_id} ({t.conf:.2f})" for t in tracks]
+                draw_detections(output_frame, boxes, labels)
+
+            # 탐지 영역 표시 (손 주변: 노랑, 중앙: 회색)
+            roi_color = (0, 255, 255) if roi_source == "hand" else (128, 128, 128)
+            cv2.rectangle(output_frame, (crop_x_start, crop_y_start), (crop_x_end, crop_y_end), roi_color, 1)
 
             # 결과 표시
-            output_frame = cv2.resize(cropped_frame, (640, 480))  # 출력창도 640x480으로 설정
+            output_frame = cv2.resize(output_frame, (640, 360))  # 전체 프레임을 축소해서 표시
             cv2.imshow("YOLO Detection", output_frame)
 
             # 'q' 키로 종료
@@ -97,4 +351,6 @@ class YOLODetector:
 
             await asyncio.sleep(0)  # 이벤트 루프 양보
 
-        cv2.destroyAllWindows()
+        print(f"[yolo] {self.scheduler.summary()}")
+        if self.display:
+            cv2.destroyAllWindows()
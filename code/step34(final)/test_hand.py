@@ -2,53 +2,204 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import asyncio
+import os
+import threading
 import time
-from datetime import datetime  # 현재 시간 출력을 위한 모듈 추가
+import urllib.request
+import config
+from gestures import MIDDLE_FINGER_TIP, WRIST, default_rules, landmarks_to_array, sample_depth
+from grasp import GRASP_START, GraspEngine
+from event_bus import FlagEvent
 
-class HandDetection:
+HAND_LANDMARKER_URL = ("https://storage.googleapis.com/mediapipe-models/hand_landmarker/"
+                       "hand_landmarker/float16/latest/hand_landmarker.task")
+
+class HandLandmarkModel:
+    """MediaPipe Hands 추론만 담당하는 모델 (실행 계층의 워커에서 생성/실행)"""
     def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands = mp.solutions.hands.Hands(
             static_image_mode=False,
             max_num_hands=2,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.5,
         )
-        self.mp_drawing = mp.solutions.drawing_utils
 
-        # 설정값
-        self.PINKY_THRESHOLD = 0.05  # 새끼손가락 TIP과 MCP 사이 거리 임계값
-        self.last_terminal_time = 0  # 마지막 터미널 출력 시간 기록
-        self.catch_flag = False  # Catch 상태 플래그
+    def process_frame(self, image):
+        """프레임을 처리하고 손 랜드마크를 감지합니다."""
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = self.hands.process(image_rgb)
+        return results
+
+    def infer(self, image):
+        """손 랜드마크 목록을 반환합니다 (프로세스 간 전달 가능한 protobuf 리스트)."""
+        results = self.process_frame(image)
+        return list(results.multi_hand_landmarks or [])
 
-    def calculate_distance(self, p1, p2):
-        """두 랜드마크 사이의 거리를 계산합니다."""
-        return np.sqrt((p1.x - p2.x) ** 2 + (p1.y - p2.y) ** 2)
 
-    def detect_catch(self, hand_landmarks):
-        """
-        새끼손가락 TIP이 MCP (세 번째 마디)에 가까워졌을 때 catch 상태로 판별합니다.
-        """
-        if hand_landmarks is None:
-            return False
+def download_hand_landmarker():
+    """MediaPipe Tasks 손 랜드마크 모델(.task) 다운로드"""
+    model_folder = os.path.join("model", "mediapipe")
+    os.makedirs(model_folder, exist_ok=True)
+    model_path = os.path.join(model_folder, "hand_landmarker.task")
+    if not os.path.exists(model_path):
+        urllib.request.urlretrieve(HAND_LANDMARKER_URL, model_path)
+    return model_path
 
-        try:
-            # 새끼손가락의 TIP과 MCP 좌표 가져오기
-            pinky_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.PINKY_TIP]
-            pinky_mcp = hand_landmarks.landmark[self.mp_hands.HandLandmark.PINKY_MCP]
 
-            # TIP과 MCP 사이 거리 계산
-            distance = self.calculate_distance(pinky_tip, pinky_mcp)
-            return distance < self.PINKY_THRESHOLD  # 임계값 이하이면 CATCH
+class HandLandmarkerModel:
+    """MediaPipe Tasks HandLandmarker (LIVE_STREAM 모드) 추론 모델
+
+    detect_async()에 타임스탬프가 붙은 프레임을 넘기면 MediaPipe 내부 스레드에서 결과 콜백이 호출되며,
+    실행 계층의 infer_async(frame, on_done) 인터페이스로 이벤트 루프에 전달됩니다.
+    결과는 HandLandmarkModel과 같은 NormalizedLandmarkList 목록으로 변환되므로
+    detect_catch / draw_hand_landmarks 등 기존 로직을 그대로 사용합니다.
+    """
+    def __init__(self, model_path=None, result_timeout=0.2):
+        from mediapipe.framework.formats import landmark_pb2
+        from mediapipe.tasks.python import BaseOptions, vision
+
+        self.landmark_pb2 = landmark_pb2
+        self.pending = {}  # timestamp_ms -> on_done
+        self.lock = threading.Lock()
+        self.last_timestamp_ms = 0
+        # 이 시간(초, 30fps 기준 약 6프레임) 안에 콜백이 오지 않으면 MediaPipe가 건너뛴 프레임으로 보고 빈 결과로 완료
+        self.result_timeout = result_timeout
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path or download_hand_landmarker()),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=2,
+            min_hand_detection_confidence=0.7,
+            min_tracking_confidence=0.5,
+            result_callback=self._on_result,
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def _to_landmark_lists(self, result):
+        """Tasks 결과를 mp.solutions와 같은 NormalizedLandmarkList 목록으로 변환합니다."""
+        hands = []
+        for landmarks in result.hand_landmarks:
+            proto = self.landmark_pb2.NormalizedLandmarkList()
+            proto.landmark.extend(self.landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z) for lm in landmarks)
+            hands.append(proto)
+        return hands
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        """MediaPipe 스레드에서 호출되는 결과 콜백"""
+        with self.lock:
+            on_done = self.pending.pop(timestamp_ms, None)
+            # 처리 중 들어와 무시된 이전 프레임이 있으면 빈 결과로 완료 (슬롯이 묶이지 않도록)
+            dropped = [self.pending.pop(t) for t in [t for t in self.pending if t < timestamp_ms]]
+        for callback in dropped:
+            callback([], None)
+        if on_done is not None:
+            on_done(self._to_landmark_lists(result), None)
+
+    def infer_async(self, image, on_done):
+        """프레임을 제출하고 타임스탬프(ms)를 요청 ID로 바로 반환합니다. 결과는 on_done(landmarks, error)로 전달됩니다."""
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with self.lock:
+            # LIVE_STREAM 모드는 단조 증가하는 타임스탬프(ms)가 필요
+            timestamp_ms = max(int(time.perf_counter() * 1000), self.last_timestamp_ms + 1)
+            self.last_timestamp_ms = timestamp_ms
+            # 콜백이 끝내 오지 않은 오래된 프레임은 빈 결과로 완료 (실행 계층 슬롯이 묶이지 않도록)
+            stale_before = timestamp_ms - int(self.result_timeout * 1000)
+            expired = [self.pending.pop(t) for t in [t for t in self.pending if t < stale_before]]
+            self.pending[timestamp_ms] = on_done
+        for callback in expired:
+            callback([], None)
+        try:
+            self.landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), timestamp_ms)
         except Exception as e:
-            print(f"Error in detect_catch: {e}")
-            return False
+            with self.lock:
+                self.pending.pop(timestamp_ms, None)
+            on_done(None, e)
+        return timestamp_ms
 
-    def process_frame(self, image):
-        """프레임을 처리하고 손 랜드마크 및 동작을 감지합니다."""
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
-        return results
+    def infer(self, image):
+        """동기 호출용 (프로세스 모드 워커): 콜백을 result_timeout초까지 기다리고, 오지 않으면 빈 결과"""
+        done = threading.Event()
+        output = {}
+
+        def on_done(result, error):
+            output["result"], output["error"] = result, error
+            done.set()
+
+        timestamp_ms = self.infer_async(image, on_done)
+        if not done.wait(self.result_timeout):
+            result = self.expire(timestamp_ms)
+            if not done.is_set():
+                return result
+        if output["error"] is not None:
+            raise output["error"]
+        return output["result"]
+
+    def expire(self, timestamp_ms):
+        """result_timeout 안에 콜백이 오지 않은 요청을 대기 목록에서 지우고 빈 결과를 반환합니다 (늦은 콜백은 무시)."""
+        with self.lock:
+            self.pending.pop(timestamp_ms, None)
+        return []
+
+    def close(self):
+        self.landmarker.close()
+
+
+def create_hand_model(backend=None):
+    """설정된 백엔드로 손 랜드마크 모델을 생성합니다 ("solutions": mp.solutions.hands, "tasks": HandLandmarker)."""
+    backend = backend or config.HAND_BACKEND
+    if backend == "tasks":
+        return HandLandmarkerModel()
+    return HandLandmarkModel()
+
+
+def hand_boxes(landmarks, width, height):
+    """(손 수, 21, 3) 랜드마크 배열을 픽셀 좌표 손 박스 (N, 4) xyxy 배열로 변환합니다."""
+    points = landmarks[:, :, :2] * np.array([width, height], dtype=np.float32)
+    return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)
+
+
+class HandDetection:
+    def __init__(self, rules=None, grasp_gestures=None, min_hand_length=None, bus=None):
+        self.mp_hands = mp.solutions.hands
+        self.mp_drawing = mp.solutions.drawing_utils
+
+        # 설정값: 제스처 규칙 (새끼손가락 TIP-MCP 거리 0.05 미만 등, gestures.default_rules 참고)
+        self.rules = rules or default_rules()
+        grasp_gestures = grasp_gestures or config.GRASP_GESTURES  # 하나라도 참이면 잡기
+        self.grasp_columns = [self.rules.index[name] for name in grasp_gestures]
+        self.min_hand_length = config.MIN_HAND_LENGTH if min_hand_length is None else min_hand_length
+        if self.min_hand_length:
+            self.rules.add("hand_size", WRIST, MIDDLE_FINGER_TIP, self.min_hand_length, below=False)
+        self.near_depth = config.HAND_NEAR_DEPTH  # 이 값 미만(멀리 있는) 손은 제외 (0이면 사용 안 함)
+        # 사용할 깊이 맵의 최대 시간 차이 (초). 정지 상태의 depth 빈도(DEPTH_IDLE_RATE)보다 짧으면 필터가 자주 빠지므로
+        # 그 주기의 1.5배까지 허용 (0이면 정지 중에는 depth가 없으므로 기본값)
+        idle_rate = config.DEPTH_IDLE_RATE
+        self.depth_max_age = max(0.5, 1.5 / idle_rate) if idle_rate > 0 else 0.5
+        self.bus = bus  # 잡기 이벤트를 발행할 EventBus (없으면 발행하지 않음)
+        self.grasp = GraspEngine()  # 최근 프레임의 판정 비율로 잡기 시작/종료를 결정 (깜빡임 방지)
+        self.catch_flag = False  # Catch 상태 플래그 (잡고 있는 손이 있는 동안 True)
+
+    def evaluate(self, landmarks):
+        """모든 손을 한 번에 판정합니다. (손 크기 필터 통과 여부, 잡기 여부) bool 배열 반환"""
+        matrix = self.rules.evaluate(landmarks)
+        keep = self.rules.column(matrix, "hand_size") if self.min_hand_length else np.ones(len(landmarks), bool)
+        grasping = matrix[:, self.grasp_columns].any(axis=1) & keep
+        return keep, grasping
+
+    def near_hands(self, results, frame_id, timestamp, landmarks):
+        """같은(가장 가까운) 프레임의 깊이 맵으로 팔이 닿는 거리의 손만 True (깊이 맵이 없으면 모두 True)"""
+        keep = np.ones(len(landmarks), dtype=bool)
+        if not self.near_depth or results is None or not len(landmarks):
+            return keep
+        depth = results.nearest("depth", frame_id, max_age=self.depth_max_age, now=timestamp)
+        if depth is None:
+            return keep
+        return sample_depth(depth.value, landmarks) >= self.near_depth
+
+    def detect_catch(self, hand_landmarks):
+        """손 하나(NormalizedLandmarkList)의 catch 여부 (기본: 새끼손가락 TIP이 MCP에 가까움)"""
+        if hand_landmarks is None:
+            return False
+        return bool(self.evaluate(landmarks_to_array([hand_landmarks]))[1][0])
 
     def draw_hand_landmarks(self, image, hand_landmarks):
         """손 랜드마크를 이미지에 그립니다."""
@@ -60,51 +211,80 @@ class HandDetection:
             self.mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2),
         )
 
-    async def manage_catch_flag(self):
-        """비동기로 catch 상태를 관리합니다."""
-        self.catch_flag = True
-        print("catch flag - 5s")
-        await asyncio.sleep(5)  # 5초 동안 유지
-        self.catch_flag = False
-        print("catch end")
-
-    def handle_catch_display(self, image, hand_landmarks):
-        """CATCH 상태를 처리: 오버레이와 터미널에 출력."""
-        if self.detect_catch(hand_landmarks):
-            # Catch 상태가 아니면 새로 태스크 시작
-            if not self.catch_flag:
-                asyncio.create_task(self.manage_catch_flag())
-
-            # 오버레이: CATCH 텍스트 즉시 표시
+    def handle_grasp_events(self, events, frame_id, timestamp):
+        """GRASP_START / GRASP_END 이벤트를 발행하고 catch 플래그 변화를 FlagEvent로 알립니다 (처리 중인 프레임 기준)."""
+        if self.bus is None:
+            self.catch_flag = self.grasp.any_grasping
+            return
+        for event in events:
+            self.bus.publish(event)
+            if event.kind == GRASP_START and not self.catch_flag:
+                self.catch_flag = True
+                self.bus.publish(FlagEvent("catch", True, event.frame_id, event.timestamp))
+        if self.catch_flag and not self.grasp.any_grasping:  # 잡고 있던 손이 모두 놓았거나 사라짐
+            self.catch_flag = False
+            self.bus.publish(FlagEvent("catch", False, frame_id, timestamp))
+
+    def handle_catch_display(self, image, grasping):
+        """CATCH 오버레이 표시 (grasping: 손별 안정된 잡기 상태 배열)."""
+        if grasping.any():
             cv2.putText(
                 image, "CATCH", (50, 50), cv2.FONT_HERSHEY_SIMPLEX,
                 1.0, (0, 0, 255), 2, cv2.LINE_AA
             )
 
-            # 터미널 출력: 1초에 한 번만 표시
-            current_time = time.time()
-            if current_time - self.last_terminal_time >= 1:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                print(f"[{now}] CATCH - Pinky TIP near MCP!")
-                self.last_terminal_time = current_time
-
-async def run_hand_detection(shared_data):
+async def run_hand_detection(shared_data, executor):
     """비동기적으로 Hand Detection 실행"""
-    hand_detection = HandDetection()
+    hand_detection = HandDetection(bus=shared_data.get('bus'))
+    channel = shared_data['channel']
+    results = shared_data.get('results')  # 손 박스를 탐지기 ROI로 공유 (ResultStore)
+    gate = shared_data.get('gate')
+    last_frame_id = 0
 
     while shared_data['running']:
-        frame = shared_data.get('frame')
-        if frame is None:
-            await asyncio.sleep(0)  # 이벤트 루프 양보
+        # 새 프레임이 도착할 때까지 대기
+        packet = await channel.next_frame(last_frame_id)
+        if packet is None:
+            break
+        last_frame_id = packet.frame_id
+        if gate is not None and not gate.allow("hand", packet):
+            packet.release()
             continue
 
-        # Hand Detection 처리
-        image = frame.copy()
-        results = hand_detection.process_frame(image)
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                hand_detection.draw_hand_landmarks(image, hand_landmarks)
-                hand_detection.handle_catch_display(image, hand_landmarks)
+        # Hand Detection 처리 (읽기 전용 프레임을 복사 없이 추론에 사용)
+        with packet:
+            multi_hand_landmarks = await executor.infer("hand", packet)
+            image = packet.image.copy()  # 랜드마크 오버레이용 복사본
+
+        # 랜드마크는 프레임당 한 번 배열로 변환
+        landmarks = landmarks_to_array(multi_hand_landmarks)
+
+        # 깊이 필터: 다른 사람의 손 등 팔이 닿지 않는 거리의 손은 판정/그리기 전에 제외
+        near = hand_detection.near_hands(results, packet.frame_id, packet.timestamp, landmarks)
+        if not near.all():
+            multi_hand_landmarks = [h for h, k in zip(multi_hand_landmarks, near) if k]
+            landmarks = landmarks[near]
+
+        # 모든 손의 제스처를 한 번에 판정
+        keep, votes = hand_detection.evaluate(landmarks)
+        if not keep.all():  # 손 크기 필터: 작은(먼) 손은 제외
+            multi_hand_landmarks = [h for h, k in zip(multi_hand_landmarks, keep) if k]
+            landmarks, votes = landmarks[keep], votes[keep]
+
+        # 프레임 판정을 손별 링 버퍼에 쌓아 안정된 잡기 상태와 시작/종료 이벤트를 얻음
+        height, width = image.shape[:2]
+        boxes = hand_boxes(landmarks, width, height)
+        grasping, events = hand_detection.grasp.update(packet.frame_id, packet.timestamp, boxes, votes)
+        hand_detection.handle_grasp_events(events, packet.frame_id, packet.timestamp)
+
+        if results is not None:
+            results.put("hand", packet.frame_id, packet.timestamp,
+                        {"boxes": boxes, "grasping": grasping, "landmarks": landmarks,
+                         "ids": hand_detection.grasp.ids})
+
+        for hand_landmarks in multi_hand_landmarks:
+            hand_detection.draw_hand_landmarks(image, hand_landmarks)
+        hand_detection.handle_catch_display(image, grasping)
 
         cv2.imshow("Hand Detection", image)
         if cv2.waitKey(1) & 0xFF == ord('q'):  # 종료 키 감지
@@ -3,19 +3,57 @@ from test_hand import *
 from test_webcam import *
 from test_detect import *
 from tts import *
+from executor import InferenceExecutor
+from multiproc import ProcessInferenceExecutor
+from frame_channel import FrameChannel
+from result_store import ResultStore
+from gating import GatingEngine, default_policies
+from event_bus import DetectionEvent, EventBus, FlagEvent, print_event
+from grasp import GraspEvent
+from fusion import FusionEngine
+import config
+import argparse
 import asyncio
 import cv2
 
-def initialize_components():
+def create_executor(webcam_processor, multiprocess=False):
+    """모델별 실행 계층 생성 및 모델 등록 (multiprocess=True이면 스테이지별 프로세스)"""
+    stages = ("depth", "hand", "yolo")
+    depth_jobs = 2  # 뎁스 스테이지에서 동시에 진행할 OpenVINO 추론 요청 수
+    max_pending = {"depth": depth_jobs, "hand": 1, "yolo": 1}
+    if multiprocess:
+        frame_shape = (webcam_processor.frame_height, webcam_processor.frame_width, 3)
+        executor = ProcessInferenceExecutor(frame_shape, stages=stages, max_pending=max_pending)
+        depth_jobs = 0  # 프로세스 모드에서는 워커 프로세스가 동기 추론
+    else:
+        executor = InferenceExecutor(stages=stages, max_pending=max_pending)
+
+    frame_size = (webcam_processor.frame_width, webcam_processor.frame_height)  # 첫 캡처 프레임의 실제 크기
+    executor.register("depth", setup_depth_model, depth_jobs, frame_size)  # 전처리는 모델에 포함
+    executor.register("hand", create_hand_model)  # config.HAND_BACKEND에 따라 solutions / tasks
+    executor.register("yolo", create_yolo_model)  # OpenVINO IR이 있으면 PyTorch 없이 실행
+    executor.start()  # 모든 모델 로드 완료까지 대기
+    return executor
+
+def initialize_components(multiprocess=False):
     """필요한 모든 구성 요소 초기화"""
     webcam_processor = WebcamProcessor(camera_id=0)  # 0: 일반 웹캠, 4: 리얼센스
-    shared_data = {'frame': None, 'running': True}
+    bus = EventBus()  # 스테이지 간 이벤트 (잡기, 감지, 플래그)
+    if config.EVENT_LOG:  # 이벤트 터미널 출력은 선택 구독자
+        bus.add_listener(print_event, FlagEvent, DetectionEvent, GraspEvent)
+    shared_data = {'channel': FrameChannel(), 'results': ResultStore(), 'bus': bus, 'running': True}
     tts = TextToSpeech()
     depth_with_tts = DepthWithTTS(tts)
-    yolo_detector = YOLODetector()
-    flag_monitor = FlagMonitor(tts)  # 플래그 모니터 초기화
+    yolo_detector = YOLODetector(bus=bus)
+    # 잡기 + 감지 융합 (이벤트 도착 시 규칙 평가) -> CatchEvent -> TTS
+    fusion = FusionEngine(bus, shared_data['results'], window=config.FUSION_WINDOW)
+    CatchAnnouncer(tts, bus)
+    executor = create_executor(webcam_processor, multiprocess)  # 모델별 추론 워커
+    tts.prepare(tts_phrases(executor.info["yolo"]["names"]))  # 안내 문장을 미리 합성
+    if config.GATING:  # 다른 스테이지의 최근 결과에 따라 스테이지 실행 여부 결정
+        shared_data['gate'] = GatingEngine(executor, shared_data['results'], default_policies())
 
-    return webcam_processor, shared_data, depth_with_tts, yolo_detector, tts, flag_monitor
+    return webcam_processor, shared_data, depth_with_tts, yolo_detector, tts, fusion, executor
 
 async def cancel_all_tasks():
     """현재 실행 중인 모든 비동기 작업을 취소"""
@@ -24,26 +62,19 @@ async def cancel_all_tasks():
         task.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
 
-async def main():
+async def main(multiprocess=False):
     # 구성 요소 초기화
-    webcam_processor, shared_data, depth_with_tts, yolo_detector, tts, flag_monitor = initialize_components()
+    webcam_processor, shared_data, depth_with_tts, yolo_detector, tts, fusion, executor = initialize_components(multiprocess)
 
     print("Starting async processes...")
 
-    # 플래그 확인 함수 생성
-    detection_flag_func = lambda: yolo_detector.detection_flag
-    catch_flag_func = lambda: flag_monitor.catch_flag  # HandDetection에서 관리하는 플래그
-
-    # 플래그 모니터링 작업 생성
-    flag_monitor_task = asyncio.create_task(flag_monitor.monitor_flags())
-
     # 프레임 공급 비동기 작업 생성
     frame_task = asyncio.create_task(webcam_processor.async_frame_provider(shared_data))
 
     # 개별 작업 비동기 실행
-    depth_task = asyncio.create_task(depth_with_tts.run(shared_data))
-    hand_task = asyncio.create_task(run_hand_detection(shared_data))
-    yolo_task = asyncio.create_task(yolo_detector.run_detection(shared_data))
+    depth_task = asyncio.create_task(depth_with_tts.run(shared_data, executor))
+    hand_task = asyncio.create_task(run_hand_detection(shared_data, executor))
+    yolo_task = asyncio.create_task(yolo_detector.run_detection(shared_data, executor))
 
     try:
         while shared_data['running']:
@@ -51,20 +82,31 @@ async def main():
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 print("Terminating by user request (q key).")
                 shared_data['running'] = False
+                shared_data['channel'].close()
                 break
             await asyncio.sleep(0.1)  # 이벤트 루프 양보
     except KeyboardInterrupt:
         print("Terminating by KeyboardInterrupt.")
         shared_data['running'] = False  # 모든 작업 중단 신호
+        shared_data['channel'].close()
     finally:
         # 모든 작업 강제 취소
         print("Cancelling all tasks...")
         await cancel_all_tasks()
 
         # 자원 해제
+        executor.report()
+        fusion.report()
+        tts.report()
+        if 'gate' in shared_data:
+            shared_data['gate'].report()
+        executor.shutdown()
         webcam_processor.release()
         cv2.destroyAllWindows()
         print("All resources released. Exiting program.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--multiprocess", action="store_true", help="depth/hand/yolo 모델을 각각 별도 프로세스에서 실행")
+    args = parser.parse_args()
+    asyncio.run(main(multiprocess=args.multiprocess))
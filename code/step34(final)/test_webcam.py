@@ -1,18 +1,117 @@
 import cv2
 import asyncio
+import threading
+import time
+from frame_channel import BufferPool
+
+
+class CaptureThread:
+    """전용 스레드에서 grab()/retrieve()로 프레임을 읽어 링 버퍼에 저장합니다.
+
+    링 버퍼는 미리 할당된 BufferPool로 구성되며, 항상 가장 최근 프레임만 노출합니다.
+    소비자가 가져가기 전에 새 프레임으로 덮어쓰인 프레임과, 모든 버퍼가 사용 중이라
+    기록하지 못한 프레임은 dropped로 집계됩니다.
+    """
+    def __init__(self, cap, frame_width, frame_height, ring_size=6):
+        self.cap = cap
+        self.pool = BufferPool((frame_height, frame_width, 3), size=ring_size)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.on_frame = None  # 새 프레임마다 캡처 스레드에서 호출되는 콜백
+        self.error = None
+
+        # 상태 변수
+        self.latest_index = -1  # 가장 최근 프레임이 들어있는 링 슬롯 (캡처 스레드가 참조 하나를 보유)
+        self.latest_seq = 0  # 가장 최근 프레임 번호
+        self.latest_time = 0.0  # 가장 최근 프레임 캡처 시각
+        self.consumed_seq = 0  # 소비자가 마지막으로 가져간 프레임 번호
+        self.captured = 0  # 캡처한 프레임 수
+        self.dropped = 0  # 소비되지 못하고 덮어쓰인 프레임 수
+
+    def start(self, on_frame=None):
+        """캡처 스레드를 시작합니다."""
+        self.on_frame = on_frame
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        """grab()으로 프레임을 받고 retrieve()로 다음 링 슬롯에 디코딩합니다."""
+        while self.running:
+            if not self.cap.grab():
+                self.error = ValueError("웹캠에서 영상을 읽을 수 없습니다.")
+                self.running = False
+                self._notify()
+                break
+            timestamp = time.perf_counter()
+
+            # 아무도 참조하지 않는 슬롯에만 기록 (소비자가 읽는 중인 버퍼는 건드리지 않음)
+            index = self.pool.acquire()
+            if index is None:
+                self.dropped += 1
+                continue
+            ret, frame = self.cap.retrieve(self.pool.buffers[index])
+            if not ret:
+                self.pool.release(index)
+                continue
+            if frame is not self.pool.buffers[index]:  # 해상도가 다르면 OpenCV가 새로 할당한 버퍼를 사용
+                self.pool.buffers[index] = frame
+
+            with self.lock:
+                if self.latest_seq > self.consumed_seq:
+                    self.dropped += 1
+                previous = self.latest_index
+                self.latest_index = index
+                self.latest_seq += 1
+                self.latest_time = timestamp
+                self.captured += 1
+            if previous >= 0:
+                self.pool.release(previous)
+            self._notify()
+
+    def _notify(self):
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def latest(self):
+        """(프레임 번호, 캡처 시각, 버퍼 인덱스)를 반환합니다. 아직 프레임이 없으면 None.
+
+        반환된 버퍼 인덱스에는 호출자 몫의 참조가 하나 추가되어 있습니다.
+        """
+        with self.lock:
+            if self.latest_index < 0:
+                return None
+            self.consumed_seq = self.latest_seq
+            self.pool.retain(self.latest_index)
+            return self.latest_seq, self.latest_time, self.latest_index
+
+    def stop(self):
+        """캡처 스레드를 종료합니다."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
 
 class WebcamProcessor:
     def __init__(self, camera_id=0, frame_width=1280, frame_height=720):
         self.cap = cv2.VideoCapture(camera_id)
         if not self.cap.isOpened():
             raise ValueError("웹캠을 열 수 없습니다.")
-        
-        self.frame_width = frame_width
-        self.frame_height = frame_height
+
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 드라이버 내부 큐에 오래된 프레임이 쌓이지 않도록
         self.current_frame = None
 
+        # 카메라가 요청한 해상도를 지원하지 않을 수 있으므로 첫 프레임의 실제 크기를 사용
+        # (링 버퍼와 뎁스 모델 전처리가 이 크기로 만들어짐)
+        self.frame_height, self.frame_width = self.read_frame().shape[:2]
+        if (self.frame_width, self.frame_height) != (frame_width, frame_height):
+            print(f"Camera resolution {self.frame_width}x{self.frame_height} "
+                  f"(requested {frame_width}x{frame_height})")
+        self.capture = CaptureThread(self.cap, self.frame_width, self.frame_height)
+
     def read_frame(self):
         """웹캠으로부터 프레임을 읽어옵니다."""
         ret, frame = self.cap.read()
@@ -22,17 +121,33 @@ class WebcamProcessor:
         return frame
 
     async def async_frame_provider(self, shared_data):
-        """비동기적으로 웹캠 프레임을 읽어 공유 메모리에 저장합니다."""
+        """캡처 스레드의 최신 프레임을 프레임 채널에 게시합니다."""
+        channel = shared_data['channel']
+        loop = asyncio.get_running_loop()
+        frame_ready = asyncio.Event()
+        self.capture.start(on_frame=lambda: loop.call_soon_threadsafe(frame_ready.set))
+
         while shared_data['running']:
-            try:
-                frame = self.read_frame()
-                shared_data['frame'] = frame.copy()
-            except ValueError as e:
-                print(e)
+            await frame_ready.wait()  # 캡처 스레드가 새 프레임을 알릴 때까지 대기
+            frame_ready.clear()
+
+            if self.capture.error is not None:
+                print(self.capture.error)
                 shared_data['running'] = False
+                channel.close()
                 break
-            await asyncio.sleep(0)  # 이벤트 루프 양보
+
+            latest = self.capture.latest()
+            if latest is None:
+                continue
+            _, timestamp, index = latest
+            pool = self.capture.pool
+            self.current_frame = pool.view(index)
+            # 복사 없이 읽기 전용 뷰를 게시 (버퍼 참조는 채널이 넘겨받음)
+            channel.publish(self.current_frame, timestamp, pool=pool, index=index)
 
     def release(self):
         """웹캠 자원을 해제합니다."""
-        self.cap.release()
\ No newline at end of file
+        self.capture.stop()
+        print(f"Capture stats: captured={self.capture.captured}, dropped={self.capture.dropped}")
+        self.cap.release()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 모듈이 패키지가 아닌 평면 구조이므로 상위 폴더를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
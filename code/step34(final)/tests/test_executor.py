@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from executor import InferenceExecutor
+
+
+class Packet:
+    def __init__(self):
+        self.image = np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+class SilentModel:
+    """LIVE_STREAM 모델처럼 infer_async로 제출하지만, 바쁜 동안 건너뛴 프레임처럼 콜백을 주지 않는 모델"""
+    result_timeout = 0.05
+
+    def __init__(self, answer_from=None):
+        self.answer_from = answer_from  # 이 번호 이후 요청부터 바로 콜백
+        self.submitted = 0
+        self.expired = []
+
+    def infer_async(self, image, on_done):
+        self.submitted += 1
+        if self.answer_from is not None and self.submitted >= self.answer_from:
+            threading.Timer(0.01, on_done, (["hand"], None)).start()
+        return self.submitted
+
+    def expire(self, request_id):
+        self.expired.append(request_id)
+        return []
+
+
+def run_hand(model, calls):
+    async def main():
+        executor = InferenceExecutor(stages=("hand",), max_pending=1)
+        executor.register("hand", lambda: model)
+        executor.start()
+        try:
+            return [await asyncio.wait_for(executor.infer("hand", Packet()), 1.0) for _ in range(calls)]
+        finally:
+            executor.shutdown()
+    return asyncio.run(main())
+
+
+def test_missing_callback_expires_and_frees_slot():
+    model = SilentModel()
+    assert run_hand(model, 3) == [[], [], []]  # 슬롯이 풀려 다음 제출이 계속됨
+    assert model.expired == [1, 2, 3]
+
+
+def test_callback_after_skipped_frame():
+    model = SilentModel(answer_from=2)
+    assert run_hand(model, 2) == [[], ["hand"]]
+    assert model.expired == [1]
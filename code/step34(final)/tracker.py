@@ -0,0 +1,234 @@
+import numpy as np
+import cv2
+
+
+def box_iou(a, b):
+    """(N, 4) x (M, 4) xyxy 박스의 IoU 행렬"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """IoU가 큰 쌍부터 1:1로 매칭합니다. ([(행, 열)], 남은 행, 남은 열) 반환"""
+    rows, cols = iou.shape
+    matches, used_rows, used_cols = [], set(), set()
+    if rows and cols:
+        for flat in np.argsort(iou, axis=None)[::-1]:
+            r, c = divmod(int(flat), cols)
+            if iou[r, c] < threshold:
+                break
+            if r in used_rows or c in used_cols:
+                continue
+            matches.append((r, c))
+            used_rows.add(r)
+            used_cols.add(c)
+    return (matches, [r for r in range(rows) if r not in used_rows],
+            [c for c in range(cols) if c not in used_cols])
+
+
+class KalmanBoxFilter:
+    """상태 [cx, cy, w, h, vx, vy, vw, vh]의 등속 칼만 필터 (잡음은 박스 크기에 비례)"""
+    POSITION_WEIGHT = 1 / 20
+    VELOCITY_WEIGHT = 1 / 160
+
+    def __init__(self, box):
+        x1, y1, x2, y2 = box
+        w, h = x2 - x1, y2 - y1
+        self.x = np.array([x1 + w / 2, y1 + h / 2, w, h, 0, 0, 0, 0], dtype=np.float64)
+        std = np.array([2 * self.POSITION_WEIGHT * h] * 4 + [10 * self.VELOCITY_WEIGHT * h] * 4)
+        self.P = np.diag(std ** 2)
+
+    def predict(self, dt):
+        """dt초 뒤의 상태를 예측합니다 (처리하는 프레임 간격이 일정하지 않으므로 시간 기준)."""
+        if dt <= 0:
+            return
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        h = self.x[3]
+        std = np.array([self.POSITION_WEIGHT * h] * 4 + [self.VELOCITY_WEIGHT * h] * 4) * max(dt * 30, 1e-3)
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + np.diag(std ** 2)
+
+    def update(self, box):
+        x1, y1, x2, y2 = box
+        w, h = x2 - x1, y2 - y1
+        z = np.array([x1 + w / 2, y1 + h / 2, w, h])
+        R = np.diag((np.array([self.POSITION_WEIGHT * h] * 4)) ** 2)
+        S = self.P[:4, :4] + R
+        K = self.P[:, :4] @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self.x[:4])
+        self.P = self.P - K @ self.P[:4, :]
+
+    @property
+    def box(self):
+        cx, cy, w, h = self.x[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+    @property
+    def speed(self):
+        """박스 높이 대비 초당 중심 이동량"""
+        return float(np.hypot(self.x[4], self.x[5]) / max(self.x[3], 1.0))
+
+
+class Track:
+    """추적 중인 객체 하나 (ID, 클래스 투표, 마지막 탐지 신뢰도)"""
+    def __init__(self, track_id, box, conf, cls):
+        self.track_id = track_id
+        self.filter = KalmanBoxFilter(box)
+        self.conf = float(conf)
+        self.class_votes = {int(cls): float(conf)}  # 클래스별 신뢰도 합 (라벨이 흔들리지 않도록)
+        self.hits = 1  # 탐지와 매칭된 키프레임 수
+        self.lost_time = 0.0  # 마지막 매칭 이후 경과 시간 (초)
+        self.confirmed = False
+
+    @property
+    def cls(self):
+        return max(self.class_votes, key=self.class_votes.get)
+
+    @property
+    def box(self):
+        return self.filter.box
+
+    def score(self, decay):
+        """마지막 탐지 신뢰도를 매칭 없이 지난 시간만큼 감쇠시킨 값"""
+        return self.conf * decay ** self.lost_time
+
+    def update(self, box, conf, cls):
+        self.filter.update(box)
+        self.conf = float(conf)
+        self.class_votes[int(cls)] = self.class_votes.get(int(cls), 0.0) + float(conf)
+        self.hits += 1
+        self.lost_time = 0.0
+
+
+class ByteTracker:
+    """IoU + 칼만 예측 기반 다중 객체 추적기 (ByteTrack 방식의 2단계 매칭)
+
+    키프레임에서는 update(detections, dt)로 고신뢰 탐지를 먼저 매칭하고,
+    남은 확정 트랙을 저신뢰 탐지와 한 번 더 매칭합니다 (가려지거나 흐려진 물체 유지).
+    키프레임 사이에는 predict(dt)로 박스만 예측합니다.
+    detections는 test_detect.DETECTION_DTYPE 구조화 배열입니다.
+    """
+    def __init__(self, high_threshold=0.5, match_iou=0.3, low_match_iou=0.5,
+                 min_hits=2, max_lost_time=1.5, decay=0.5):
+        self.high_threshold = high_threshold  # 이 이상이면 1차 매칭 및 새 트랙 생성
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.min_hits = min_hits  # 확정(confirmed)까지 필요한 매칭 수
+        self.max_lost_time = max_lost_time  # 매칭 없이 유지할 최대 시간 (초)
+        self.decay = decay  # 초당 신뢰도 감쇠율
+        self.tracks = []
+        self.next_id = 1
+
+    def predict(self, dt):
+        """키프레임이 아닌 프레임: 모든 트랙을 dt초만큼 예측하고 확정 트랙을 반환합니다."""
+        for track in self.tracks:
+            track.filter.predict(dt)
+            track.lost_time += dt
+        self.tracks = [t for t in self.tracks if t.lost_time <= self.max_lost_time]
+        return self.active_tracks()
+
+    def update(self, detections, dt):
+        """키프레임: 예측 후 탐지와 매칭하고 확정 트랙을 반환합니다."""
+        for track in self.tracks:
+            track.filter.predict(dt)
+            track.lost_time += dt
+
+        high = detections[detections['conf'] >= self.high_threshold]
+        low = detections[detections['conf'] < self.high_threshold]
+
+        # 1차: 모든 트랙 x 고신뢰 탐지
+        track_boxes = np.array([t.box for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        matches, rest_tracks, rest_high = greedy_match(box_iou(track_boxes, high['xyxy']), self.match_iou)
+        for r, c in matches:
+            self.tracks[r].update(*high[c])
+
+        # 2차: 남은 확정 트랙 x 저신뢰 탐지
+        remaining = [self.tracks[r] for r in rest_tracks if self.tracks[r].confirmed]
+        remaining_boxes = np.array([t.box for t in remaining], dtype=np.float32).reshape(-1, 4)
+        low_matches, _, _ = greedy_match(box_iou(remaining_boxes, low['xyxy']), self.low_match_iou)
+        for r, c in low_matches:
+            remaining[r].update(*low[c])
+
+        # 매칭되지 않은 미확정 트랙은 바로 제거, 확정 트랙은 max_lost_time까지 유지
+        self.tracks = [t for t in self.tracks
+                       if t.lost_time == 0.0 or (t.confirmed and t.lost_time <= self.max_lost_time)]
+        for track in self.tracks:
+            if track.hits >= self.min_hits:
+                track.confirmed = True
+
+        for c in rest_high:
+            box, conf, cls = high[c]
+            self.tracks.append(Track(self.next_id, box, conf, cls))
+            self.next_id += 1
+        return self.active_tracks()
+
+    def active_tracks(self):
+        return [t for t in self.tracks if t.confirmed]
+
+    def confidence(self):
+        """확정 트랙 중 가장 낮은 감쇠 신뢰도 (확정 트랙이 없으면 1)
+
+        새 물체는 장면 움직임으로 키프레임을 유발하고, 미확정 트랙은 다음 키프레임에서 확정됩니다.
+        """
+        return min((t.score(self.decay) for t in self.active_tracks()), default=1.0)
+
+    def max_speed(self):
+        """확정 트랙의 최대 이동 속도 (박스 높이/초)"""
+        return max((t.filter.speed for t in self.active_tracks()), default=0.0)
+
+
+def motion_thumbnail(image, size=(32, 48)):
+    """장면 움직임 비교용 작은 흑백 이미지"""
+    return cv2.cvtColor(cv2.resize(image, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+
+def scene_motion(previous, current):
+    """두 썸네일의 평균 밝기 차이 [0, 1] (이전 썸네일이 없으면 1)"""
+    if previous is None:
+        return 1.0
+    return float(cv2.absdiff(previous, current).mean()) / 255.0
+
+
+class DetectionScheduler:
+    """탐지기 실행 주기(키프레임 간격)를 장면 움직임과 추적 신뢰도에 따라 조절합니다.
+
+    추적이 안정적이면 간격을 두 배씩 늘리고(max_interval까지), 장면이 크게 바뀌거나
+    추적 신뢰도가 낮거나 트랙이 빠르게 움직이면 바로 탐지하고 간격을 min_interval로 되돌립니다.
+    max_interval=1이면 매 프레임 탐지합니다.
+    """
+    def __init__(self, min_interval=1, max_interval=8, motion_threshold=0.06,
+                 confidence_threshold=0.4, speed_threshold=1.0):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.motion_threshold = motion_threshold
+        self.confidence_threshold = confidence_threshold
+        self.speed_threshold = speed_threshold
+        self.interval = min_interval
+        self.frames_since_keyframe = 0
+        self.frames = 0
+        self.keyframes = 0
+
+    def should_detect(self, motion, confidence, speed):
+        self.frames += 1
+        self.frames_since_keyframe += 1
+        unstable = (motion > self.motion_threshold or confidence < self.confidence_threshold
+                    or speed > self.speed_threshold)
+        if unstable:
+            self.interval = self.min_interval
+        if self.frames_since_keyframe < self.interval:
+            return False
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        if not unstable:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return True
+
+    def summary(self):
+        return f"keyframes={self.keyframes}/{self.frames} interval={self.interval}"
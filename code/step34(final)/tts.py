@@ -4,16 +4,30 @@ import cv2
 import asyncio
 import time
 from datetime import datetime  # 현재 시간 출력용
-from test_depth import setup_depth_model, process_depth_sections, display_depth_sections
-import sys
-from io import StringIO
-from queue import Queue
+from test_depth import normalize_depth, depth_map_to_image, compute_section_stats, decide_direction, display_depth_sections
+import config
+from audio import PhraseCache, create_audio_sink
+from cues import CuePlayer, ToneBank, obstacle_cue
+from speech import OBSTACLE, PRIORITY_NAMES, PRODUCT, SpeechScheduler, classify
+from fusion import CatchEvent
+
+AVOID_PHRASES = ("Avoid to Right", "Avoid to Left")
+
+
+def tts_phrases(class_names):
+    """시작할 때 미리 합성할 문장 목록 (회피 안내 + 클래스별 '[class name] catch')"""
+    names = class_names.values() if isinstance(class_names, dict) else class_names
+    return list(AVOID_PHRASES) + [f"{name} catch" for name in names]
+
 
 class TextToSpeech:
-    def __init__(self, rate=150, volume=0.9, voice_index=0):
-        """TTS 엔진 초기화 및 설정"""
-        self.engine = pyttsx3.init()
-        self.queue = Queue()  # TTS 메시지 관리 큐
+    def __init__(self, rate=150, volume=0.9, voice_index=0, cache_dir=None, sink=None, engine=None):
+        """TTS 엔진 초기화 및 설정 (캐시 폴더와 재생 장치가 있으면 미리 합성한 문장을 바로 재생)
+
+        sink: 재생 장치 종류(create_audio_sink 인자) 또는 장치 객체, engine: pyttsx3 엔진 (벤치마크에서 교체용)
+        """
+        self.engine = pyttsx3.init() if engine is None else engine
+        self.engine_lock = threading.Lock()  # 엔진은 미리 합성(메인 스레드)과 큐 처리 스레드가 함께 사용
 
         # 속도 및 볼륨 설정
         self.engine.setProperty('rate', rate)
@@ -26,145 +40,219 @@ class TextToSpeech:
         else:
             print("Voice index out of range. Using default voice.")
 
+        # 문장 캐시와 재생 장치 (둘 중 하나라도 없으면 매번 pyttsx3로 합성하며 말하기)
+        cache_dir = config.TTS_CACHE_DIR if cache_dir is None else cache_dir
+        self.cache = PhraseCache(self.engine, cache_dir) if cache_dir else None
+        if sink is None or isinstance(sink, str):
+            sink = create_audio_sink(config.AUDIO_SINK if sink is None else sink) if self.cache else None
+        self.sink = sink if self.cache is not None else None
+        self.gap = 0.5 if self.sink is None else 0.1  # 메시지 간 간격 (캐시 재생은 짧게)
+        # 우선순위 / 유효 시간 / 중복 합치기 스케줄러. 재생 장치가 있으면 높은 우선순위가 재생 중인 안내를 끊음
+        self.scheduler = SpeechScheduler(interrupt=self.sink.stop if self.sink is not None else None,
+                                         reset=self.sink.reset if self.sink is not None else None)
+
         # 상태 변수
         self.last_tts_time = 0  # 마지막 TTS 실행 시간
         self.last_avoid_time = 0  # 마지막 Avoid 메시지 큐 추가 시간
         self.is_tts_busy = False  # 현재 TTS 실행 중인지 여부
+        self.first_audio = {name: [] for name in PRIORITY_NAMES.values()}  # 큐 추가부터 재생 시작까지 (초)
+        self.speaking = None  # pyttsx3로 직접 말하는 중인 메시지 (첫 소리 시각 기록용)
+        self.engine.connect('started-utterance', self._on_utterance_started)  # 합성이 끝나고 말하기 시작할 때
 
         # TTS 큐 처리 스레드 시작
         self.tts_thread = threading.Thread(target=self._process_queue, daemon=True)
         self.tts_thread.start()
 
-    def speak(self, text, priority=False):
-        """주어진 텍스트를 TTS 큐에 추가"""
+    def prepare(self, phrases):
+        """사용할 문장을 미리 합성해 메모리에 올립니다 (디스크 캐시가 있으면 읽기만 함)."""
+        if self.sink is None:
+            return
+        start = time.perf_counter()
+        with self.engine_lock:
+            synthesized = self.cache.prerender(phrases)
+        print(f"TTS phrase cache: {len(phrases)} phrases ({synthesized} synthesized) "
+              f"in {time.perf_counter() - start:.2f}s, sink={type(self.sink).__name__}")
+
+    def speak(self, text, priority=None, deadline=None):
+        """주어진 텍스트를 스케줄러에 추가
+
+        priority: OBSTACLE / PRODUCT / INFO (없으면 문장으로 판단, True는 OBSTACLE)
+        deadline: 유효 시간(초). 이 안에 말하지 못하면 버림 (없으면 우선순위별 기본값)
+        """
         if text is None:  # None 상태는 처리하지 않음
             return
+        if isinstance(priority, bool):  # 이전 호출 방식 (priority=True: 최우선 메시지)
+            priority = OBSTACLE if priority else None
+        priority = classify(text) if priority is None else priority
 
-        if priority:
-            # 최우선 메시지는 큐를 비우고 바로 추가
-            with self.queue.mutex:
-                self.queue.queue.clear()  # 기존 메시지 제거
-            self.queue.put(text)  # 최우선 메시지 추가
-        else:
+        key = None
+        if priority == OBSTACLE:
             # Avoid 메시지는 5초에 한 번만 추가
             if "Avoid" in text:
                 current_time = time.time()
                 if current_time - self.last_avoid_time < 5:
                     return  # 5초 이내에는 메시지 추가 안 함
                 self.last_avoid_time = current_time
-
-            # 일반 메시지는 큐에 중복되지 않게 추가
-            if text not in self.queue.queue:
-                self.queue.put(text)
+            key = "obstacle"  # 대기 중인 회피 안내는 최신 방향으로 교체
+
+        self.scheduler.put(text, priority, key=key, deadline=deadline)
+
+    def _record_first_audio(self, message, started):
+        self.first_audio[PRIORITY_NAMES[message.priority]].append(started - message.enqueued)
+
+    def _on_utterance_started(self, name):
+        message, self.speaking = self.speaking, None  # 미리 합성(save_to_file)의 알림은 무시
+        if message is not None:
+            self._record_first_audio(message, time.perf_counter())
+
+    def _say(self, message):
+        """캐시된 문장은 재생 장치로 바로 재생하고, 처음 보는 문장만 합성합니다."""
+        if self.sink is not None:
+            with self.engine_lock:
+                clip, _ = self.cache.load(message.text)  # 처음 보는 문장은 합성 후 캐시에 추가
+            if self.scheduler.preempted(message):  # 합성하는 동안 더 높은 우선순위가 들어옴
+                return
+            started = time.perf_counter()
+            try:
+                played = clip is not None and self.sink.play(clip)  # 끼어들기가 오면 sink.stop()으로 바로 반환
+            except Exception as e:  # 재생 장치 오류는 큐 처리 스레드를 끝내지 않고 실시간 합성으로 대신함
+                print(f"Audio sink error: {e}. Speaking with live synthesis.")
+                played = False
+            if played:
+                self._record_first_audio(message, started)
+                return
+        with self.engine_lock:  # 재생 장치가 없으면 기존 방식 (첫 소리는 합성 시간만큼 더 늦고 끊을 수 없음)
+            self.speaking = message
+            self.engine.say(message.text)
+            self.engine.runAndWait()
+            self.speaking = None
 
     def _process_queue(self):
         """큐에서 메시지를 꺼내 순차적으로 음성 출력"""
         while True:
-            text = self.queue.get()  # 메시지 가져오기
+            message = self.scheduler.get()  # 가장 높은 우선순위의 유효한 메시지
+            if message is None:  # 스케줄러 종료
+                break
             self.is_tts_busy = True
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{now}] TTS Output: {text}")  # 터미널 출력
-            self.engine.say(text)
-            self.engine.runAndWait()
+            print(f"[{now}] TTS Output: {message.text}")  # 터미널 출력
+            self._say(message)
             self.is_tts_busy = False
-            time.sleep(0.5)  # 메시지 간 간격 추가
-
-import sys
-import asyncio
-from datetime import datetime
+            if not self.scheduler.done(message):
+                print(f"[{now}] TTS Interrupted: {message.text}")
+                continue  # 끼어든 메시지는 간격 없이 바로 재생
+            time.sleep(self.gap)  # 메시지 간 간격 추가
+
+    def report(self):
+        """우선순위별 스케줄러 통계와 큐 추가부터 소리 시작까지의 시간"""
+        self.scheduler.report()
+        for kind, delays in self.first_audio.items():
+            if not delays:
+                continue
+            delays = sorted(d * 1000 for d in delays)
+            print(f"[tts] {kind} time-to-first-audio n={len(delays)} mean={sum(delays) / len(delays):.1f}ms "
+                  f"p95={delays[int(len(delays) * 0.95)]:.1f}ms max={delays[-1]:.1f}ms")
 
-class FlagMonitor:
-    def __init__(self, tts):
-        self.catch_flag = False  # Catch 플래그 상태
-        self.detect_flag = False  # Detect 플래그 상태
-        self.previous_combined_state = False  # 이전 결합 상태
+class CatchAnnouncer:
+    def __init__(self, tts, bus):
+        """FusionEngine이 발행한 CatchEvent를 받아 '[class name] catch'를 TTS로 출력 (EventBus 리스너)"""
         self.tts = tts  # TTS 인스턴스
-        self.last_detected_class = None  # 마지막 감지된 클래스 이름
-        self.is_priority_tts_active = False  # 최우선 TTS 활성화 상태
-        self.original_stdout = sys.stdout  # 원래 stdout 저장
-        sys.stdout = self  # stdout 리다이렉트
-
-    def write(self, text):
-        """터미널 출력 감지 및 플래그 상태 업데이트"""
-        # Catch 플래그 상태 업데이트
-        if "catch flag - 5s" in text:
-            self.catch_flag = True
-        elif "catch end" in text:
-            self.catch_flag = False
-
-        # Detect 플래그 상태 업데이트
-        if "class detect flag - 5s" in text:
-            self.detect_flag = True
-        elif "class flag end" in text:
-            self.detect_flag = False
-
-        # 클래스 이름 감지 (Detected: cider (0.90))
-        if "Detected:" in text:
-            parts = text.split("Detected:")
-            if len(parts) > 1:
-                class_name = parts[1].strip().split(" ")[0]  # 클래스 이름 추출
-                self.last_detected_class = class_name
-
-        # 원래 stdout에 출력
-        self.original_stdout.write(text)
-
-    def flush(self):
-        """flush 호출을 위한 메서드 (stdout 요구사항)"""
-        self.original_stdout.flush()
-
-    async def monitor_flags(self):
-        """플래그 상태를 지속적으로 모니터링 (둘 다 True일 때 TTS 출력)"""
-        while True:
-            # 현재 상태 결합
-            current_combined_state = (self.catch_flag and self.detect_flag)
-
-            # 둘 다 True일 때만 처리
-            if current_combined_state and not self.previous_combined_state:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                print(f"[{now}] Both Catch and Detect Flags are True!")
+        bus.add_listener(self.on_catch, CatchEvent)
 
-                # TTS로 '[class name] catch' 출력 (최우선순위)
-                if self.last_detected_class and not self.tts.is_tts_busy:
-                    tts_message = f"{self.last_detected_class} catch"
-                    self.tts.speak(tts_message)
-
-            # 상태가 False로 유지되거나 다시 False로 변경된 경우
-            self.previous_combined_state = current_combined_state
-
-            await asyncio.sleep(0.1)  # 0.1초마다 상태 확인
+    def on_catch(self, event):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{now}] {event.class_name} catch (hand {event.hand_id}, "
+              f"{event.latency * 1000:.0f}ms since capture)")
+        self.tts.speak(f"{event.class_name} catch", PRODUCT)  # 말하는 중이면 유효 시간 안에서 대기
 
 class DepthWithTTS:
-    def __init__(self, tts):
-        """Depth 모델과 TTS를 결합한 클래스"""
-        self.depth_processor = setup_depth_model()
+    def __init__(self, tts, feedback=None):
+        """Depth 모델과 TTS를 결합한 클래스 (모델은 실행 계층에 "depth"로 등록)"""
         self.tts = tts
-
-    async def run(self, shared_data):
+        self.feedback = config.OBSTACLE_FEEDBACK if feedback is None else feedback
+        self.cues = None  # 좌우 신호음 재생기 (feedback이 tone / both일 때)
+        if self.feedback in ("tone", "both"):
+            sink = create_audio_sink(config.AUDIO_SINK)  # TTS와 별도 출력 스트림
+            if sink is None or not sink.mixes:  # 섞을 수 없는 장치는 신호음이 음성 안내를 끊음
+                print(f"Tone cues need a mixing audio sink ({type(sink).__name__ if sink else 'none'}). Using speech.")
+                self.feedback = "speech"
+            else:
+                self.cues = CuePlayer(sink, ToneBank(cache_dir=config.TTS_CACHE_DIR or None))
+        self.start_time = time.perf_counter()  # 첫 뎁스 프레임까지의 시간 측정용
+        self.first_frame_reported = False
+
+    def analyze(self, depth_result):
+        """뎁스 결과로 섹션 분석과 시각화를 수행합니다 (워커 스레드에서 실행).
+
+        (판단, 신호음 (pan, proximity) 또는 None, 섹션 표시 이미지, [0, 1] 깊이 맵)을 반환합니다.
+        """
+        depth_map = normalize_depth(depth_result)  # min/max는 한 번만 계산
+        depth_frame = depth_map_to_image(depth_map)  # 캐시된 컬러맵 LUT 적용
+
+        # 깊이 섹션 분석 (결정과 오버레이가 같은 통계를 사용)
+        stats = compute_section_stats(depth_map, num_rows=5, num_cols=5)
+        decision = decide_direction(stats, threshold=0.8)
+        cue = obstacle_cue(stats, threshold=0.8)
+
+        # 섹션이 표시된 뎁스 이미지 (depth_frame은 새로 만든 배열이므로 복사 불필요)
+        depth_frame_with_sections = display_depth_sections(
+            depth_frame, depth_map, output_width=1280, output_height=720, stats=stats
+        )
+        return decision, cue, depth_frame_with_sections, depth_map
+
+    @staticmethod
+    async def _infer(executor, packet):
+        with packet:
+            return packet.frame_id, packet.timestamp, await executor.infer("depth", packet)
+
+    async def _submit_frames(self, shared_data, executor, in_flight):
+        """새 프레임마다 뎁스 추론을 제출합니다 (최대 스테이지 슬롯 수만큼 동시에 진행)."""
+        channel = shared_data['channel']
+        gate = shared_data.get('gate')  # 정지 상태에서는 낮은 빈도로만 실행 (GatingEngine)
+        last_frame_id = 0
+        try:
+            while shared_data['running']:
+                # 새 프레임이 도착할 때까지 대기
+                packet = await channel.next_frame(last_frame_id)
+                if packet is None:
+                    break
+                last_frame_id = packet.frame_id
+                if gate is not None and not gate.allow("depth", packet):
+                    packet.release()
+                    continue
+                # OpenVINO 뎁스 모델 처리 (전용 워커에서 실행, 프레임은 복사 없이 전달)
+                await in_flight.put(asyncio.create_task(self._infer(executor, packet)))
+        finally:
+            await in_flight.put(None)
+
+    async def run(self, shared_data, executor):
         """비동기적으로 뎁스 모델을 실행하고 결과를 TTS로 출력"""
+        # 제출 순서대로 결과를 받아 섹션 분석에 전달 (프레임 N 추론 중 N+1 전처리)
+        in_flight = asyncio.Queue(maxsize=executor.limits["depth"])
+        results = shared_data.get('results')  # 깊이 맵을 손 스테이지와 공유 (ResultStore)
+        submitter = asyncio.create_task(self._submit_frames(shared_data, executor, in_flight))
         while shared_data['running']:
-            frame = shared_data['frame']
-            if frame is None:
-                await asyncio.sleep(0)  # 이벤트 루프 양보
-                continue
+            job = await in_flight.get()
+            if job is None:
+                break
 
             try:
-                # OpenVINO 뎁스 모델 처리
-                depth_result = self.depth_processor.process_frame(frame)
-                depth_map = (depth_result.squeeze(0) - depth_result.min()) / (depth_result.max() - depth_result.min())
-                depth_frame = self.depth_processor.visualize_result(depth_result)
-
-                # 깊이 섹션 분석
-                decision = process_depth_sections(depth_map, num_rows=5, num_cols=5, threshold=0.8)
-
-                # TTS로 결과 출력
-                if decision:
+                frame_id, timestamp, depth_result = await job
+                if not self.first_frame_reported:
+                    print(f"Time to first depth frame: {time.perf_counter() - self.start_time:.2f}s")
+                    self.first_frame_reported = True
+                decision, cue, depth_frame_with_sections, depth_map = await executor.post("depth", self.analyze, depth_result)
+                if results is not None:
+                    results.put("depth", frame_id, timestamp, depth_map)
+
+                # 신호음은 깊이 프레임마다 갱신 (장애물이 없으면 조용히)
+                if self.cues is not None:
+                    self.cues.update(cue)
+
+                # TTS로 결과 출력 (신호음 재생이 오류로 멈췄으면 음성으로 대신)
+                if decision and (self.feedback != "tone" or not self.cues.running):
                     self.tts.speak(decision)
 
-                # 섹션이 표시된 뎁스 이미지
-                depth_frame_with_sections = display_depth_sections(
-                    depth_frame.copy(), depth_map, num_rows=5, num_cols=5, output_width=1280, output_height=720
-                )
-
                 # 텍스트 출력
                 if decision:
                     cv2.putText(
@@ -189,4 +277,8 @@ class DepthWithTTS:
 
             await asyncio.sleep(0)  # 이벤트 루프 양보
 
+        submitter.cancel()
+        if self.cues is not None:
+            print(f"[cues] {self.cues.played} tones played")
+            self.cues.close()
         cv2.destroyAllWindows()